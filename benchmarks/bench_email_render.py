@@ -0,0 +1,196 @@
+"""
+Micro-benchmark of the email renderers.
+
+Renders synthetic digests of growing size with the old string-concatenation
+loops (kept here as the baseline), the template renderers that replaced them,
+the byte-budgeted renderer (cards past EMAIL_HTML_BUDGET become link-only rows),
+the whole multipart message as sent (out KB is its encoded size, which has to stay
+under EMAIL_SIZE_BUDGET) and the streaming writers, reporting best-of time, peak
+traced memory and output size.
+
+    python benchmarks/bench_email_render.py --articles 10,100,1000,5000 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "old_backup"))
+
+import market_watcher as mw  # noqa: E402
+
+try:
+    import naver_news_scraper_auto as naver
+except ImportError as e:
+    print(f"(naver renderer skipped: {e})")
+    naver = None
+
+
+def jit_results(count):
+    variant = {"text": "Line one of the post.\n" * 12, "prompt": "Isometric illustration, blue tones --ar 16:9 " * 3}
+    return [
+        {
+            "keyword": f"Keyword {i % 7}",
+            "title": f"Headline number {i} & what it means for <Korean> startups",
+            "link": f"https://news.example.com/articles/{i}?src=rss&lang=en",
+            "status": "published" if i % 10 else "jit_failed",
+            "alternates": [{"title": "Alt", "link": f"https://alt.example.com/{i}", "source": "Alt Daily", "keyword": "k"}],
+            "variants": {"Insight": variant, "Storytelling": variant, "Viral": variant},
+        }
+        for i in range(count)
+    ]
+
+
+def naver_articles(count):
+    return [
+        {
+            "keyword": f"키워드 {i % 7}",
+            "title": f"기사 제목 {i} <속보> & 분석",
+            "link": f"https://n.news.naver.com/article/{i}?sid=105&type=1",
+            "press": "연합뉴스",
+            "date": "1시간 전",
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_jit_email(results):
+    """The pre-template generate_jit_email loop (inline styles, no escaping)"""
+    html = "<html><body>"
+    for item in results:
+        status_color = "#2da44e" if item['status'] == 'published' else "#cf222e"
+        alternates_html = ""
+        if item.get('alternates'):
+            links = ", ".join(f"<a href=\"{alt['link']}\" style=\"color: #666;\">{alt['source']}</a>"
+                              for alt in item['alternates'])
+            alternates_html = f"""<div style="font-size: 11px; color: #999; margin-top: 4px;">Also covered by: {links}</div>"""
+        html += f"""
+        <div style="margin-top: 30px; border: 1px solid #ddd; border-radius: 12px; overflow: hidden;">
+            <div style="padding: 15px; background: #f8f9fa; border-bottom: 1px solid #eee; display: flex;">
+                <div>
+                    <span style="font-size: 11px; font-weight: bold; color: #666; text-transform: uppercase;">{item['keyword']}</span>
+                    <h3 style="margin: 5px 0 0 0; font-size:16px;"><a href="{item.get('link','#')}" style="text-decoration: none; color: #111;">{item.get('title')}</a></h3>
+                    {alternates_html}
+                </div>
+                <div style="font-size:11px; font-weight:bold; color:{status_color}; border:1px solid {status_color}; padding:2px 8px;">
+                    {item['status'].upper()}
+                </div>
+            </div>
+        """
+        if item['status'] == 'published' and item.get('variants'):
+            html += """<div style="display: grid; grid-template-columns: 1fr 1fr 1fr; border-top: 1px solid #eee;">"""
+            for name, key, bg, accent in [("📊 Insight", "Insight", "#e8f4fd", "#0366d6"),
+                                          ("☕ Story", "Storytelling", "#f0fff4", "#2da44e"),
+                                          ("🔥 Viral", "Viral", "#fff8c5", "#d29922")]:
+                data = item['variants'].get(key)
+                if not data: continue
+                html += f"""
+                <div style="border-right: 1px solid #eee; display: flex; flex-direction: column;">
+                    <div style="background:{bg}; padding:8px; font-weight:bold; color:{accent}; font-size:13px;">{name}</div>
+                    <div style="padding:15px; font-size:12px; line-height:1.4; flex-grow:1;">{data['text'].replace(chr(10), '<br>')}</div>
+                    <div style="background:#2d3748; color:#fff; padding:8px; font-size:10px; margin:10px; border-radius:4px;">
+                        <span style="color:#4fd1c5;">🎨 Prompt:</span><br>
+                        <span style="font-family:monospace;">{data['prompt'][:100]}...</span>
+                    </div>
+                </div>
+                """
+            html += "</div>"
+        html += "</div>"
+    return html + "</body></html>"
+
+
+def legacy_naver_email(articles):
+    """The pre-template _generate_html_email loop (no escaping)"""
+    grouped = {}
+    for article in articles:
+        grouped.setdefault(article['keyword'], []).append(article)
+    html = "<!DOCTYPE html><html><body>"
+    for keyword, keyword_articles in grouped.items():
+        html += f"""
+                <h2>🔍 {keyword} ({len(keyword_articles)}개)</h2>
+            """
+        for article in keyword_articles:
+            html += f"""
+                <div class="article">
+                    <div class="article-title">
+                        <a href="{article['link']}" target="_blank">{article['title']}</a>
+                    </div>
+                    <div class="article-meta">
+                        <span class="press">{article['press']}</span>
+                        <span class="date">{article['date']}</span>
+                    </div>
+                </div>
+                """
+    return html + "</body></html>"
+
+
+def budgeted_message(results):
+    """One digest as the wire bytes send_digests would hand to SMTP"""
+    digests = mw.DigestRenderer(results)
+    msg = mw.make_budgeted_message("[bench] JIT Brief", lambda budget: digests.render(budget=budget),
+                                   "reader@example.com", None, lambda budget: digests.render_text(budget=budget))
+    return mw.SmtpPool.wire_bytes(msg)
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def renderers():
+    scraper = naver and naver.NaverNewsScraper.__new__(naver.NaverNewsScraper)  # no session / history needed
+    rows = [
+        ("jit legacy", jit_results, legacy_jit_email),
+        ("jit template", jit_results, lambda data: "".join(mw.iter_jit_email(data))),
+        ("jit budgeted", jit_results, mw.generate_jit_email),
+        ("jit message", jit_results, budgeted_message),
+        ("jit stream", jit_results, lambda data: mw.write_jit_email(data, DEVNULL)),
+    ]
+    if scraper:
+        rows += [
+            ("naver legacy", naver_articles, legacy_naver_email),
+            ("naver template", naver_articles, scraper._generate_html_email),
+            ("naver stream", naver_articles, lambda data: scraper.write_html_email(data, DEVNULL)),
+        ]
+    return rows
+
+
+DEVNULL = open(os.devnull, "w", encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Email renderer micro-benchmark")
+    parser.add_argument("--articles", default="10,100,1000,5000", help="comma-separated digest sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'renderer':<16}{'articles':>10}{'best ms':>12}{'us/article':>12}{'peak KB':>12}{'out KB':>10}")
+    for count in [int(n) for n in args.articles.split(",")]:
+        for name, make_data, render in renderers():
+            data = make_data(count)
+            seconds = best_of(lambda: render(data), args.repeat)
+            peak = peak_memory(lambda: render(data))
+            out = render(data)
+            if isinstance(out, str): out = out.encode("utf-8")
+            size = f"{len(out) / 1024:.0f}" if isinstance(out, bytes) else "-"  # streams: n/a
+            print(f"{name:<16}{count:>10}{seconds * 1000:>12.2f}{seconds / count * 1e6:>12.1f}{peak / 1024:>12.0f}{size:>10}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
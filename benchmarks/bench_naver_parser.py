@@ -0,0 +1,74 @@
+"""
+네이버 검색 결과 파서 백엔드 벤치마크.
+
+저장된 fixture 페이지(benchmarks/fixtures/naver/*.html)를 설치된 모든 백엔드로
+파싱해 페이지당 시간과 bs4 대비 속도 향상을 출력합니다.
+
+    python benchmarks/bench_naver_parser.py [--repeat 20] [--limit 5]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'old_backup'))
+
+import naver_news_scraper_auto as scraper  # noqa: E402
+
+FIXTURE_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures', 'naver')
+
+
+def load_pages():
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.html'))):
+        with open(path, encoding='utf-8') as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+
+def bench(parse, pages, repeat, limit):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _, html in pages:
+            parse(html, 'bench', limit=limit)
+        best = min(best, time.perf_counter() - started)
+    return best / len(pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=5, help='스트리밍 모드에서 추출할 항목 수')
+    args = parser.parse_args()
+
+    pages = load_pages()
+    if not pages:
+        print(f"fixture 페이지가 없습니다: {FIXTURE_DIR}")
+        return
+
+    backends = {name: parse for name, parse in scraper.PARSERS.items() if parse}
+    reference = [scraper.parse_results_bs4(html, 'bench') for _, html in pages]
+
+    print(f"fixture {len(pages)}개, 반복 {args.repeat}회 (최소값 기준, 페이지당)")
+    print(f"{'backend':<12}{'full (ms)':>12}{'x bs4':>8}{f'limit={args.limit} (ms)':>16}{'x bs4':>8}")
+
+    baseline_full = bench(scraper.parse_results_bs4, pages, args.repeat, None)
+    baseline_limit = bench(scraper.parse_results_bs4, pages, args.repeat, args.limit)
+
+    for name, parse in backends.items():
+        # 모든 백엔드는 bs4와 같은 결과를 내야 합니다.
+        results = [parse(html, 'bench') for _, html in pages]
+        if results != reference:
+            print(f"{name:<12}결과가 bs4와 다릅니다!")
+            continue
+        full = baseline_full if name == 'bs4' else bench(parse, pages, args.repeat, None)
+        limited = baseline_limit if name == 'bs4' else bench(parse, pages, args.repeat, args.limit)
+        print(f"{name:<12}{full * 1000:>12.2f}{baseline_full / full:>8.1f}"
+              f"{limited * 1000:>16.2f}{baseline_limit / limited:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
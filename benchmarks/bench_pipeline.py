@@ -0,0 +1,200 @@
+"""
+Offline benchmark of the scrape -> generate -> email pipeline.
+
+Runs market_watcher's stages against local stubs (see stubs.py) and the
+recorded fixture corpus, then reports per-stage latency percentiles and
+peak traced memory for each keyword count.
+
+    python benchmarks/bench_pipeline.py --keywords 5,50,200 --runs 5 --api-latency 0.3
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import stubs  # noqa: E402
+
+STAGES = ["sourcing", "parsing", "dedup", "generation", "rendering", "send"]
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def start_upstreams(args):
+    feed = stubs.start_feed_server(args.feed_latency, distinct=not args.shared_stories)
+    api = stubs.start_anthropic_stub(args.api_latency, args.batch_latency, args.token_latency)
+    smtp = stubs.start_smtp_sink(args.smtp_latency, args.smtp_session_limit)
+
+    # market_watcher reads these at import / call time
+    os.environ["FEED_BASE_URL"] = feed.url + "/rss/search"
+    os.environ["FETCH_HOST_RATE"] = str(args.host_rate)
+    os.environ["ANTHROPIC_API_KEY"] = "stub"
+    os.environ["ANTHROPIC_BASE_URL"] = api.url
+    os.environ["SMTP_HOST"], os.environ["SMTP_PORT"] = smtp.host, str(smtp.port)
+    os.environ["SMTP_STARTTLS"] = "0"
+    os.environ["EMAIL_USER"], os.environ["EMAIL_PASSWORD"] = "bench@example.com", "stub"
+    os.environ["EMAIL_RECIPIENTS"] = ",".join(f"reader{i}@example.com" for i in range(args.recipients))
+    os.environ["CACHE_FILE"] = ""  # every run pays full price
+    os.environ["JOURNAL_FILE"] = ""
+    os.environ["GEN_STREAM"] = "0" if args.no_stream else "1"
+    if args.batch:
+        os.environ["GEN_BATCH"], os.environ["GEN_BATCH_POLL"] = "1", "0.1"
+    return feed, api, smtp
+
+
+def load_naver_parser():
+    """Naver page parser from the legacy scraper (None if its deps are missing)"""
+    try:
+        sys.path.insert(0, os.path.join(ROOT, "old_backup"))
+        import naver_news_scraper_auto as naver
+    except ImportError as e:
+        print(f"(parsing stage skipped: {e})")
+        return None, []
+    pages = []
+    naver_dir = os.path.join(stubs.FIXTURE_DIR, "naver")
+    for name in sorted(os.listdir(naver_dir)):
+        with open(os.path.join(naver_dir, name), encoding="utf-8") as f:
+            pages.append(f.read())
+    return naver.get_parser(), pages
+
+
+def make_subscribers(mw, keywords, per_reader):
+    """EMAIL_RECIPIENTS readers; with per_reader each follows a rotating slice of the keywords"""
+    subscribers = mw.load_subscribers()
+    if per_reader:
+        for i, sub in enumerate(subscribers):
+            sub["keywords"] = [keywords[(i + j) % len(keywords)] for j in range(min(per_reader, len(keywords)))]
+    return subscribers
+
+
+def render_digest(mw, results):
+    """The everything-digest (HTML + plain text) a reader following all keywords gets"""
+    digests = mw.DigestRenderer(results)
+    return digests.render(), digests.render_text()
+
+
+def run_once(mw, keywords, subscribers, parse, pages):
+    """One pass over every stage; returns {stage: seconds}"""
+    timings = {}
+
+    def timed(stage, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        timings[stage] = time.perf_counter() - started
+        return result
+
+    found = timed("sourcing", mw.fetch_all_news_jit, keywords)
+    if parse:
+        timed("parsing", lambda: [parse(pages[i % len(pages)], kw) for i, kw in enumerate(keywords)])
+    sourced = [(kw, a) for kw, articles in zip(keywords, found) for a in (articles or [None])]
+    articles = timed("dedup", mw.collapse_near_duplicates, [a for _, a in sourced if a])
+    variants = timed("generation", mw.generate_all_jit, articles)
+    results = []
+    for article, variant in zip(articles, variants):
+        item = dict(article, status="published" if variant else "jit_failed")
+        if variant:
+            item["variants"] = variant
+        results.append(item)
+    timed("rendering", render_digest, mw, results)
+    timed("send", mw.send_digests, "[bench] JIT Brief", results, subscribers)
+    return timings
+
+
+def measure_memory(mw, keywords, subscribers, parse, pages):
+    """Peak traced allocation per stage (separate pass: tracing skews timings)"""
+    peaks = {}
+    tracemalloc.start()
+    stage_funcs = {
+        "sourcing": lambda ctx: ctx.update(found=mw.fetch_all_news_jit(keywords)),
+        "parsing": lambda ctx: parse and [parse(pages[i % len(pages)], kw) for i, kw in enumerate(keywords)],
+        "dedup": lambda ctx: ctx.update(articles=mw.collapse_near_duplicates(
+            [a for articles in ctx["found"] for a in (articles or [])])),
+        "generation": lambda ctx: ctx.update(variants=mw.generate_all_jit(ctx["articles"])),
+        "rendering": lambda ctx: ctx.update(results=[
+            dict(a, status="published", variants=v) if v else dict(a, status="jit_failed")
+            for a, v in zip(ctx["articles"], ctx["variants"])]) or render_digest(mw, ctx["results"]),
+        "send": lambda ctx: mw.send_digests("[bench] JIT Brief", ctx["results"], subscribers),
+    }
+    ctx = {}
+    for stage in STAGES:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        stage_funcs[stage](ctx)
+        peaks[stage] = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return peaks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark")
+    parser.add_argument("--keywords", default="5,50", help="comma-separated keyword counts")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--api-latency", type=float, default=0.0, help="seconds per Claude call")
+    parser.add_argument("--feed-latency", type=float, default=0.0, help="seconds per RSS fetch")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds per streamed chunk (~4 tokens)")
+    parser.add_argument("--no-stream", action="store_true", help="wait for whole responses (GEN_STREAM=0)")
+    parser.add_argument("--batch", action="store_true", help="generate through the Message Batches API")
+    parser.add_argument("--batch-latency", type=float, help="seconds a batch takes to end (default: --api-latency)")
+    parser.add_argument("--smtp-latency", type=float, default=0.0, help="seconds per DATA command")
+    parser.add_argument("--recipients", type=int, default=1, help="brief fan-out (EMAIL_RECIPIENTS)")
+    parser.add_argument("--reader-keywords", type=int, default=0,
+                        help="keywords each recipient follows (0 = all, one shared digest)")
+    parser.add_argument("--smtp-session-limit", type=int, help="sink hangs up (421) after this many messages")
+    parser.add_argument("--shared-stories", action="store_true",
+                        help="serve the raw fixtures (keywords share stories, dedup collapses them)")
+    parser.add_argument("--host-rate", type=float, default=0, help="FETCH_HOST_RATE (0 = unlimited)")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    feed, api, smtp = start_upstreams(args)
+    import market_watcher as mw
+
+    parse, pages = load_naver_parser()
+    report = {}
+
+    for count in [int(n) for n in args.keywords.split(",")]:
+        keywords = [f"Fixture Keyword {i}" for i in range(count)]
+        subscribers = make_subscribers(mw, keywords, args.reader_keywords)
+        samples = {stage: [] for stage in STAGES}
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(args.runs):
+                for stage, seconds in run_once(mw, keywords, subscribers, parse, pages).items():
+                    samples[stage].append(seconds)
+            peaks = measure_memory(mw, keywords, subscribers, parse, pages)
+
+        report[count] = {
+            stage: {
+                "p50_ms": percentile(samples[stage], 50) * 1000,
+                "p90_ms": percentile(samples[stage], 90) * 1000,
+                "p99_ms": percentile(samples[stage], 99) * 1000,
+                "peak_kb": peaks.get(stage, 0) / 1024,
+            }
+            for stage in STAGES if samples[stage]
+        }
+
+        print(f"\n=== {count} keywords x {args.runs} runs ===")
+        print(f"{'stage':<12}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'peak KB':>12}")
+        for stage, row in report[count].items():
+            print(f"{stage:<12}{row['p50_ms']:>10.1f}{row['p90_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['peak_kb']:>12.0f}")
+
+    print(f"\nupstream hits: feed={feed.hits} claude={api.hits} "
+          f"smtp={smtp.messages} msgs / {smtp.sessions} sessions / {smtp.bytes} bytes")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+"""
+Local stand-ins for the pipeline's upstreams, used by the benchmarks.
+
+- Google News RSS: serves benchmarks/fixtures/rss/*.xml (with ETag / 304 support),
+  optionally with per-keyword headlines so keyword counts scale the whole pipeline
+- Anthropic Messages API: answers with canned posts from benchmarks/fixtures/claude,
+  streamed (SSE) when asked, plus the Message Batches endpoints (create / retrieve / cancel / results) and
+  prompt caching (blocks up to a cache_control breakpoint are "cached" on first use,
+  without the real API's minimum length)
+- SMTP: accepts and counts messages (EHLO, AUTH, MAIL, RCPT, DATA), no TLS;
+  optionally ends each session with a 421 after session_limit messages
+
+Each server runs on 127.0.0.1 in a daemon thread:
+
+    feed = start_feed_server(latency=0.05)
+    os.environ["FEED_BASE_URL"] = feed.url + "/rss/search"
+"""
+import glob
+import hashlib
+import json
+import os
+import random
+import re
+import socketserver
+import threading
+import time
+import urllib.parse
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Models sometimes keep talking after the format block; streaming clients can skip it
+TRAILER = "\n\nLet me know if you'd like a shorter version, a different tone or more hashtags for this post!"
+
+# Which canned response answers a single-style prompt
+STYLE_MARKERS = {
+    "Insight": "Senior VC Analyst",
+    "Storytelling": "Startup Founder",
+    "Viral": "Gen Z Trend Setter",
+}
+
+
+def load_rss_fixtures():
+    feeds = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "rss", "*.xml"))):
+        with open(path, "rb") as f:
+            body = f.read()
+        feeds.append((body, '"%s"' % hashlib.sha1(body).hexdigest()))
+    return feeds
+
+
+def load_claude_fixtures():
+    with open(os.path.join(FIXTURE_DIR, "claude", "responses.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real upstreams
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+TITLE_PATTERN = re.compile(rb"<title>(.*?) - ([^<]*)</title>")
+
+
+def distinct_titles(body, query):
+    """Rewrite item headlines so every keyword gets its own stories
+    (otherwise near-duplicate collapsing merges keywords that share a fixture)."""
+    words = sorted(set(re.findall(rb"[A-Za-z]{4,}", body)))
+    rng = random.Random(query)
+
+    def rewrite(match):
+        return b"<title>" + b" ".join(rng.sample(words, 8)) + b" - " + match.group(2) + b"</title>"
+
+    return TITLE_PATTERN.sub(rewrite, body)
+
+
+class FeedHandler(_QuietHandler):
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        self.server.hits += 1
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query).get("q", [""])[0]
+        # Same keyword -> same fixture, spread evenly over the corpus
+        body, etag = self.server.feeds[zlib.crc32(query.encode("utf-8")) % len(self.server.feeds)]
+        if self.server.distinct:
+            body = distinct_titles(body, query)
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_body(200, body, "application/rss+xml; charset=utf-8", {"ETag": etag})
+
+
+STREAM_CHUNK_CHARS = 16  # Text per streamed delta (~4 tokens)
+NOT_FOUND = b'{"type":"error","error":{"type":"not_found_error","message":"stub"}}'
+BATCH_PATH = re.compile(r"^/v1/messages/batches/([^/]+)(/results|/cancel)?$")
+
+
+class AnthropicHandler(_QuietHandler):
+    def send_json(self, payload, headers=None):
+        self.send_body(200, json.dumps(payload).encode("utf-8"), "application/json", headers)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        path = urllib.parse.urlparse(self.path).path
+        time.sleep(self.server.latency)
+        self.server.hits += 1
+
+        if path == "/v1/messages" and request.get("stream"):
+            self.send_stream(self.server.build_message(request))
+        elif path == "/v1/messages":
+            message = self.server.build_message(request)
+            # Same generation time as streaming, just delivered all at once
+            time.sleep(self.server.token_latency * -(-len(message["content"][0]["text"]) // STREAM_CHUNK_CHARS))
+            self.send_json(message, self.server.rate_limit_headers())
+        elif path == "/v1/messages/batches":
+            self.send_json(self.server.create_batch(request))
+        elif BATCH_PATH.match(path) and path.endswith("/cancel"):
+            batch = self.server.cancel_batch(BATCH_PATH.match(path).group(1))
+            if batch:
+                self.send_json(batch)
+            else:
+                self.send_body(404, NOT_FOUND, "application/json")
+        else:
+            self.send_body(404, NOT_FOUND, "application/json")
+
+    def send_stream(self, message, chunk_chars=STREAM_CHUNK_CHARS):
+        """Server-sent events in Messages streaming order, token_latency per text chunk.
+        A client that stops reading early just closes the connection."""
+        text = message["content"][0]["text"]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        for name, value in self.server.rate_limit_headers().items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.close_connection = True
+
+        def event(name, payload):
+            self.wfile.write(f"event: {name}\ndata: {json.dumps(dict(payload, type=name))}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        usage = message["usage"]
+        start = dict(message, content=[], stop_reason=None, usage=dict(usage, output_tokens=1))
+        try:
+            event("message_start", {"message": start})
+            event("content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}})
+            for i in range(0, len(text), chunk_chars):
+                time.sleep(self.server.token_latency)
+                event("content_block_delta", {"index": 0, "delta": {"type": "text_delta", "text": text[i:i + chunk_chars]}})
+            event("content_block_stop", {"index": 0})
+            event("message_delta", {"delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                    "usage": {"output_tokens": usage["output_tokens"]}})
+            event("message_stop", {})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_GET(self):
+        match = BATCH_PATH.match(urllib.parse.urlparse(self.path).path)
+        batch = match and self.server.batch_status(match.group(1))
+        if not batch or match.group(2) == "/cancel":
+            self.send_body(404, NOT_FOUND, "application/json")
+        elif match.group(2) == "/results":
+            lines = self.server.batch_results(match.group(1))
+            self.send_body(200, "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8"),
+                           "application/binary")
+        else:
+            self.send_json(batch)
+
+
+def prompt_text(request):
+    content = request["messages"][0]["content"]
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content)
+
+
+class AnthropicStub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency, batch_latency, token_latency):
+        super().__init__(address, AnthropicHandler)
+        self.latency = latency
+        self.batch_latency = batch_latency
+        self.token_latency = token_latency
+        self.hits = 0
+        self.responses = load_claude_fixtures()
+        self.batches = {}
+        self.batch_lock = threading.Lock()
+        self.prompt_cache = set()
+
+    def respond_to(self, prompt):
+        """Canned text for a prompt: tagged sections for multi-style, plain otherwise"""
+        requested = [name for name in self.responses if f"### {name}" in prompt]
+        if requested:
+            parts = []
+            for name in requested:
+                text = self.responses[name]
+                for tag in ("POST", "IMAGE"):
+                    text = text.replace(f"[{tag}]", f"[{tag}:{name}]").replace(f"[/{tag}]", f"[/{tag}:{name}]")
+                parts.append(text)
+            return "\n\n".join(parts)
+        for name, marker in STYLE_MARKERS.items():
+            if marker in prompt:
+                return self.responses[name]
+        return next(iter(self.responses.values()))
+
+    def prompt_usage(self, request):
+        """input / cache_read / cache_write token counts for a request's prompt"""
+        content = request["messages"][0]["content"]
+        blocks = [{"text": content}] if isinstance(content, str) else content
+        cached_upto = max((n + 1 for n, block in enumerate(blocks) if block.get("cache_control")), default=0)
+        prefix = "".join(block.get("text", "") for block in blocks[:cached_upto])
+        rest = "".join(block.get("text", "") for block in blocks[cached_upto:])
+        if not prefix:
+            return {"input_tokens": len(rest) // 4}
+        key = hashlib.sha1(prefix.encode("utf-8")).hexdigest()
+        with self.batch_lock:
+            hit = key in self.prompt_cache
+            self.prompt_cache.add(key)
+        return {
+            "input_tokens": len(rest) // 4,
+            "cache_read_input_tokens": len(prefix) // 4 if hit else 0,
+            "cache_creation_input_tokens": 0 if hit else len(prefix) // 4,
+        }
+
+    def build_message(self, request):
+        prompt = prompt_text(request)
+        text = self.respond_to(prompt) + TRAILER
+        return {
+            "id": "msg_stub_%d" % self.hits,
+            "type": "message",
+            "role": "assistant",
+            "model": request.get("model", "stub"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": dict(self.prompt_usage(request), output_tokens=len(text) // 4),
+        }
+
+    # Message Batches: a batch "processes" for batch_latency seconds, then every
+    # request succeeds (requests still pending at cancel time come back canceled)
+
+    def create_batch(self, request):
+        with self.batch_lock:
+            batch_id = "msgbatch_stub_%d" % (len(self.batches) + 1)
+            self.batches[batch_id] = {
+                "requests": request.get("requests", []),
+                "created": time.time(),
+                "cancelled": None,
+            }
+        return self.batch_status(batch_id)
+
+    def cancel_batch(self, batch_id):
+        with self.batch_lock:
+            batch = self.batches.get(batch_id)
+            if not batch:
+                return None
+            if batch["cancelled"] is None:
+                batch["cancelled"] = time.time()
+        return self.batch_status(batch_id)
+
+    def batch_status(self, batch_id):
+        batch = self.batches.get(batch_id)
+        if not batch:
+            return None
+        finished = batch["created"] + self.batch_latency
+        ended = time.time() >= finished or batch["cancelled"] is not None
+        done = len(batch["requests"]) if time.time() >= finished else 0
+        iso = lambda ts: time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts)) if ts else None
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else ("canceling" if batch["cancelled"] else "in_progress"),
+            "request_counts": {
+                "processing": 0 if ended else len(batch["requests"]),
+                "succeeded": done,
+                "errored": 0,
+                "canceled": len(batch["requests"]) - done if ended else 0,
+                "expired": 0,
+            },
+            "created_at": iso(batch["created"]),
+            "expires_at": iso(batch["created"] + 86400),
+            "ended_at": iso(min(finished, batch["cancelled"] or finished)) if ended else None,
+            "cancel_initiated_at": iso(batch["cancelled"]),
+            "archived_at": None,
+            "results_url": f"{self.url}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+    def batch_results(self, batch_id):
+        batch = self.batches[batch_id]
+        succeeded = time.time() >= batch["created"] + self.batch_latency
+        for item in batch["requests"]:
+            if succeeded:
+                result = {"type": "succeeded", "message": self.build_message(item["params"])}
+            else:
+                result = {"type": "canceled"}
+            yield {"custom_id": item["custom_id"], "result": result}
+
+    def rate_limit_headers(self):
+        reset = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + 60))
+        return {
+            "anthropic-ratelimit-requests-limit": "4000",
+            "anthropic-ratelimit-requests-remaining": "3999",
+            "anthropic-ratelimit-requests-reset": reset,
+        }
+
+
+class SmtpHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        self.server.record_session()
+        self.reply("220 sink ESMTP")
+        sent = 0
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb == "MAIL" and self.server.session_limit and sent >= self.server.session_limit:
+                self.reply("421 4.7.0 Too many messages for this session, closing")
+                return
+            if verb in ("EHLO", "HELO"):
+                self.reply("250-sink")
+                self.reply("250-AUTH PLAIN LOGIN")
+                self.reply("250-PIPELINING")
+                self.reply("250 8BITMIME")
+            elif verb == "AUTH":
+                self.reply("235 2.7.0 Authentication successful")
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                for data_line in self.rfile:
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    size += len(data_line)
+                time.sleep(self.server.latency)
+                self.server.record(size)
+                sent += 1
+                self.reply("250 OK queued")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, latency, session_limit):
+        super().__init__(address, SmtpHandler)
+        self.latency = latency
+        self.session_limit = session_limit
+        self.sessions = 0
+        self.messages = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def record_session(self):
+        with self.lock:
+            self.sessions += 1
+
+    def record(self, size):
+        with self.lock:
+            self.messages += 1
+            self.bytes += size
+
+
+def _serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    server.host, server.port = host, port
+    server.url = f"http://{host}:{port}"
+    return server
+
+
+def start_feed_server(latency=0.0, distinct=True):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.distinct = distinct
+    server.hits = 0
+    server.feeds = load_rss_fixtures()
+    return _serve(server)
+
+
+def start_anthropic_stub(latency=0.0, batch_latency=None, token_latency=0.0):
+    """batch_latency: seconds a Message Batch takes to end (default: latency)
+    token_latency: seconds per streamed text chunk (~4 tokens)"""
+    return _serve(AnthropicStub(("127.0.0.1", 0), latency,
+                                latency if batch_latency is None else batch_latency, token_latency))
+
+
+def start_smtp_sink(latency=0.0, session_limit=None):
+    """session_limit: messages per session before the sink answers 421 and hangs up"""
+    return _serve(SmtpSink(("127.0.0.1", 0), latency, session_limit))
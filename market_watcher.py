@@ -2,12 +2,29 @@ import feedparser
 import datetime
 import os
 import smtplib
+import email.utils
 import time
 import random
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email import charset as email_charset
 import urllib.parse
 import re
+import calendar
+import heapq
+import itertools
+import threading
+import contextlib
+import functools
+import uuid
+import hashlib
+import json
+import sqlite3
+import queue
+import string
+import textwrap
+from html import escape
+from concurrent.futures import ThreadPoolExecutor
 import anthropic
 
 # --- 1. Settings ---
@@ -19,11 +36,86 @@ KEYWORDS = [
     "FoodTech Investment"
 ]
 ARCHIVE_FILE = "NEWS_ARCHIVE.md"
+ARCHIVE_INDEX_FILE = "NEWS_ARCHIVE.index.json"  # date -> file/offsets/URL hashes
+ARCHIVE_SHARD_DIR = "archive"                   # Monthly shards once ARCHIVE_FILE is full
+ARCHIVE_MAX_BYTES = 1_000_000
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY")
 
+# Email Settings
+SMTP_HOST = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", 587))
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "1") == "1"
+SMTP_CONNECTIONS = int(os.environ.get("SMTP_CONNECTIONS", 3))  # Authenticated sessions sending in parallel
+SMTP_MESSAGES_PER_SESSION = 100                                # Reconnect before the server's per-session cap
+SMTP_TIMEOUT = 30
+EMAIL_SIZE_BUDGET = 100_000  # Encoded bytes per email as sent; Gmail clips past ~102KB, later cards become links
+EMAIL_HTML_BUDGET = EMAIL_SIZE_BUDGET // 78 * 57  # Raw HTML bytes whose base64 alone fits (57 per 76-char CRLF line)
+EMAIL_TEXT_BUDGET = EMAIL_SIZE_BUDGET // 5         # Encoded bytes the plain-text part may take; HTML gets the rest
+# Comma-separated; empty = the brief goes to EMAIL_USER only
+EMAIL_RECIPIENTS = [r.strip() for r in os.environ.get("EMAIL_RECIPIENTS", "").split(",") if r.strip()]
+# Personalised digests: [{"email": ..., "keywords": [...], "styles": [...]}, ...]
+# (omitted keywords/styles = all). SUBSCRIBERS_JSON (e.g. a secret) wins over the file;
+# with neither, EMAIL_RECIPIENTS get the full brief.
+SUBSCRIBERS_FILE = os.environ.get("SUBSCRIBERS_FILE", "subscribers.json")
+SUBSCRIBERS_JSON = os.environ.get("SUBSCRIBERS_JSON", "")
+
 # JIT Settings
-JIT_MAX_RETRIES = 3
-JIT_RETRY_DELAY = 5
+JIT_MAX_RETRIES = 3        # Attempts per unit (one article style / one feed fetch)
+JIT_RETRY_DELAY = 5        # Backoff base (seconds), doubled per attempt with full jitter
+JIT_RETRY_MAX_DELAY = 60   # Backoff cap, also caps honoured Retry-After
+JIT_RUN_BUDGET = int(os.environ.get("JIT_RUN_BUDGET", 900))  # Seconds of retrying allowed per run
+
+# Sourcing Settings
+FEED_BASE_URL = os.environ.get("FEED_BASE_URL", "https://news.google.com/rss/search")
+FEED_CONDITIONAL_GET = True                                    # ETag/Last-Modified per feed URL (stored in CACHE_FILE)
+FETCH_WORKERS = int(os.environ.get("FETCH_WORKERS", 8))        # Concurrent feed fetches
+FETCH_HOST_RATE = float(os.environ.get("FETCH_HOST_RATE", 5))  # Max requests/sec per host
+NEWS_PER_KEYWORD = int(os.environ.get("NEWS_PER_KEYWORD", 1))  # Newest K articles per keyword
+
+# Scheduler Settings (per-keyword polling, state stored in CACHE_FILE)
+SCHEDULE_MIN_INTERVAL = 3600          # Busiest keywords: at most every hour
+SCHEDULE_MAX_INTERVAL = 7 * 86400     # Quiet keywords: at least weekly (also the widest when: window)
+SCHEDULE_SLACK = 2 * 3600             # Due this early, so cron jitter doesn't skip a whole day
+SCHEDULE_RATE_SMOOTHING = 0.5         # EWMA weight of the latest articles/hour observation
+SCHEDULE_WINDOWS = (1, 2, 3, 7)       # when: windows in days (fixed set keeps feed URLs cacheable)
+SCHEDULE_FIRST_INTERVAL = 86400       # New keywords start on the daily cron
+SCHEDULE_BACKOFF = 2                  # Quiet keywords back off at most this factor per poll
+
+# Near-duplicate Settings (same story, different outlet/title)
+DEDUP_THRESHOLD = 0.5   # Estimated Jaccard similarity of title shingles
+DEDUP_PERMUTATIONS = 64 # MinHash signature length (= bands * rows)
+DEDUP_BANDS = 16        # LSH bands; 16x4 rows puts the candidate threshold near 0.5
+DEDUP_SHINGLE = 3       # Character shingle size; shorter titles are never merged
+
+# Generation Settings
+GEN_MODEL = "claude-3-haiku-20240307"
+GEN_TEMPERATURE = 0.7
+GEN_WORKERS = int(os.environ.get("GEN_WORKERS", 8))                          # Concurrent Claude calls
+GEN_REQUESTS_PER_MINUTE = int(os.environ.get("GEN_REQUESTS_PER_MINUTE", 50))  # Until headers say otherwise
+GEN_SINGLE_CALL = os.environ.get("GEN_SINGLE_CALL", "0") == "1"              # All styles in one request
+GEN_STREAM = os.environ.get("GEN_STREAM", "1") == "1"                        # Stream, stop once the last section closes
+GEN_PROMPT_CACHE = os.environ.get("GEN_PROMPT_CACHE", "1") == "1"            # Cache the shared per-article prompt prefix
+GEN_PROMPT_CACHE_MIN_TOKENS = 2048                                           # Shortest prefix Haiku will cache
+GEN_BATCH = os.environ.get("GEN_BATCH", "0") == "1"                          # Message Batches API (async, for big runs)
+GEN_BATCH_POLL = float(os.environ.get("GEN_BATCH_POLL", 10))                 # First status poll (seconds), doubled per poll
+GEN_BATCH_POLL_MAX = 300                                                     # Poll interval cap
+GEN_BATCH_TIMEOUT = int(os.environ.get("GEN_BATCH_TIMEOUT", 3 * 3600))       # Then cancel; unanswered units go synchronous
+
+# Circuit Breaker Settings (per upstream, shared by all keywords in a run)
+BREAKER_THRESHOLD = 5   # Consecutive transient failures before the circuit opens
+BREAKER_COOLDOWN = 60   # Seconds open before a single half-open probe is allowed
+
+# Metrics Settings (empty = disabled)
+METRICS_JSONL = os.environ.get("METRICS_JSONL", "")          # One JSON line per span
+METRICS_PROM_FILE = os.environ.get("METRICS_PROM_FILE", "")  # Prometheus textfile-collector format
+
+# Cache Settings (generated variants + feed validators, persisted between runs)
+CACHE_FILE = os.environ.get("CACHE_FILE", ".jit_cache.sqlite")
+CACHE_TTL_DAYS = 7
+CACHE_MAX_ENTRIES = 5000
+
+# Checkpoint Settings (completed units of today's run, so a rerun resumes instead of restarting)
+JOURNAL_FILE = os.environ.get("JOURNAL_FILE", ".jit_journal.jsonl")
 
 # Styles
 STYLES = {
@@ -46,60 +138,770 @@ STYLES = {
 
 # --- 2. JIT Engine ---
 
+class RunMetrics:
+    """Spans + counters for one run, exported as JSON lines / Prometheus textfile"""
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.spans = []
+        self.counters = {}
+        self.gauges = {}
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name, **attrs):
+        """Time a block; the yielded dict collects extra attributes"""
+        started = time.time()
+        t0 = time.perf_counter()
+        outcome = "ok"
+        try:
+            yield attrs
+        except Exception as e:
+            outcome = "error"
+            attrs['error'] = str(e)[:200]
+            raise
+        finally:
+            record = {"run": self.run_id, "span": name, "start": round(started, 3),
+                      "duration": round(time.perf_counter() - t0, 6), "outcome": outcome}
+            record.update(attrs)
+            with self.lock:
+                self.spans.append(record)
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    @staticmethod
+    def _labels(pairs):
+        """Label set in exposition format (values escape \\, " and newlines)"""
+        def escape(value):
+            return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return ",".join(f'{k}="{escape(v)}"' for k, v in pairs)
+
+    def prometheus(self):
+        totals = {}
+        for record in self.spans:
+            key = (record['span'], record['outcome'])
+            count, seconds = totals.get(key, (0, 0.0))
+            totals[key] = (count + 1, seconds + record['duration'])
+        lines = [
+            "# HELP market_watcher_span_seconds Time spent per pipeline span.",
+            "# TYPE market_watcher_span_seconds summary",
+        ]
+        for (span, outcome), (count, seconds) in sorted(totals.items()):
+            labels = self._labels([('span', span), ('outcome', outcome)])
+            lines.append(f"market_watcher_span_seconds_sum{{{labels}}} {seconds:.6f}")
+            lines.append(f"market_watcher_span_seconds_count{{{labels}}} {count}")
+        for name in sorted({key[0] for key in self.counters}):
+            lines.append(f"# TYPE market_watcher_{name}_total counter")
+            for (counter, labels), value in sorted(self.counters.items()):
+                if counter != name: continue
+                lines.append(f"market_watcher_{name}_total{{{self._labels(labels)}}} {value}")
+        for (name, labels), value in sorted(self.gauges.items()):
+            lines.append(f"market_watcher_{name}{{{self._labels(labels)}}} {value}")
+        lines.append(f"market_watcher_last_run_timestamp_seconds {time.time():.0f}")
+        return "\n".join(lines) + "\n"
+
+    def export(self):
+        if METRICS_JSONL:
+            with open(METRICS_JSONL, 'a', encoding='utf-8') as f:
+                for record in self.spans:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                for (name, labels), value in sorted(self.gauges.items()):
+                    f.write(json.dumps({"run": self.run_id, "gauge": name, "value": value, **dict(labels)}) + "\n")
+        if METRICS_PROM_FILE:
+            # Atomic replace: the node_exporter textfile collector may read at any time
+            tmp_path = METRICS_PROM_FILE + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus())
+            os.replace(tmp_path, METRICS_PROM_FILE)
+        tokens = {labels[0][1]: value for (name, labels), value in self.counters.items() if name == "tokens"}
+        print(f"📈 Metrics: {len(self.spans)} spans, {tokens.get('input', 0)} input / {tokens.get('output', 0)} output tokens"
+              f" (prompt cache: {tokens.get('cache_read', 0)} read / {tokens.get('cache_write', 0)} written)")
+
+metrics = RunMetrics()
+
+def traced(name, payload_arg=None):
+    """Record every call of the wrapped function as a span
+    (payload_arg: index of a str argument whose size is recorded)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with metrics.span(name) as span:
+                if payload_arg is not None and payload_arg < len(args):
+                    span['payload_bytes'] = len(args[payload_arg].encode('utf-8'))
+                result = func(*args, **kwargs)
+                if isinstance(result, str):
+                    span['bytes'] = len(result.encode('utf-8'))
+                return result
+        return wrapper
+    return decorator
+
+class JitFatalError(Exception):
+    """Failure that no retry can fix (missing key, bad request, ...)"""
+
+RUN_DEADLINE = time.monotonic() + JIT_RUN_BUDGET
+
+# Programming errors: retrying the same call can't succeed
+FATAL_EXCEPTIONS = (JitFatalError, TypeError, ValueError, KeyError, AttributeError)
+
+def is_retryable(e):
+    """Classify an exception: transient (retry) vs fatal (give up now)"""
+    if isinstance(e, FATAL_EXCEPTIONS): return False
+    status = getattr(e, 'status_code', None)
+    if status is not None:
+        # 408 timeout, 409 conflict, 429 rate limit, 5xx/529 overloaded
+        return status in (408, 409, 429) or status >= 500
+    return True  # Connection errors, timeouts, ...
+
+def retry_after_seconds(e):
+    """Server-requested wait from a Retry-After header, if any"""
+    response = getattr(e, 'response', None)
+    value = response.headers.get('retry-after') if response is not None else None
+    if not value: return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+            return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+def backoff_delay(attempt, e):
+    """Exponential backoff with full jitter; Retry-After wins when present"""
+    server_delay = retry_after_seconds(e)
+    if server_delay is not None:
+        return min(server_delay, JIT_RETRY_MAX_DELAY)
+    return random.uniform(0, min(JIT_RETRY_MAX_DELAY, JIT_RETRY_DELAY * (2 ** attempt)))
+
+class UpstreamError(Exception):
+    """Transient upstream failure that didn't raise on its own (e.g. feedparser)"""
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class CircuitOpenError(JitFatalError):
+    """Upstream is known to be down; fail fast instead of retrying"""
+
+class CircuitBreaker:
+    """closed -> open after BREAKER_THRESHOLD failures -> half-open probe after cooldown"""
+    def __init__(self, name, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.trips = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == "closed": return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = "half_open"
+            if self.state == "half_open" and not self.probing:
+                self.probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state != "closed":
+                print(f"🟢 [Breaker] {self.name} recovered")
+            self.state = "closed"
+            self.failures = 0
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.threshold):
+                if self.state == "closed":
+                    print(f"🔴 [Breaker] {self.name} opened after {self.failures} failures")
+                    self.trips += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    @contextlib.contextmanager
+    def guard(self):
+        """Wrap one upstream call; raises CircuitOpenError while the circuit is open"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit open")
+        try:
+            yield
+        except Exception as e:
+            # Fatal errors (bad request, auth) still mean the upstream answered
+            if is_retryable(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+
+BREAKERS = {name: CircuitBreaker(name) for name in ("google_news", "anthropic")}
+
+def report_breakers():
+    """Breaker states for the run report (console + metrics)"""
+    states = {"closed": 0, "half_open": 1, "open": 2}
+    for breaker in BREAKERS.values():
+        metrics.gauge("circuit_state", states[breaker.state], upstream=breaker.name)
+        metrics.gauge("circuit_trips", breaker.trips, upstream=breaker.name)
+        metrics.gauge("circuit_rejected_calls", breaker.rejected, upstream=breaker.name)
+        if breaker.trips or breaker.state != "closed":
+            print(f"🔌 [Breaker] {breaker.name}: {breaker.state}, tripped {breaker.trips}x, "
+                  f"skipped {breaker.rejected} call(s)")
+
 def jit_retry(func):
-    """Retry Decorator"""
+    """Retry Decorator (per unit: classified errors, backoff, shared run budget)"""
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
         for attempt in range(JIT_MAX_RETRIES):
             try:
                 return func(*args, **kwargs)
             except Exception as e:
+                metrics.count("failed_attempts", func=func.__name__)
+                if not is_retryable(e):
+                    print(f"❌ [JIT Fatal] {func.__name__}: {e} (not retrying)")
+                    metrics.count("fatal_errors", func=func.__name__)
+                    return None
                 print(f"⚠️ [JIT Warning] Attempt {attempt+1} failed: {e}")
-                time.sleep(JIT_RETRY_DELAY + random.uniform(0, 1))
+                if attempt + 1 == JIT_MAX_RETRIES: break
+                delay = backoff_delay(attempt, e)
+                if time.monotonic() + delay > RUN_DEADLINE:
+                    print(f"⏱️ [JIT Warning] Run retry budget exhausted, giving up on {func.__name__}")
+                    metrics.count("budget_exhausted", func=func.__name__)
+                    break
+                metrics.count("retries", func=func.__name__)
+                time.sleep(delay)
         return None
     return wrapper
 
-def get_latest_news_jit(keyword):
-    """Get the LATEST news (Sorted by time)"""
+def run_parallel(func, items, workers):
+    """Map func over items on a bounded thread pool (keeps input order)"""
+    if not items: return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(items)))) as pool:
+        return list(pool.map(func, items))
+
+class HostRateLimiter:
+    """Spaces out requests per host (shared across worker threads)"""
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval: return
+        host = urllib.parse.urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+host_limiter = HostRateLimiter(FETCH_HOST_RATE)
+
+def build_feed_url(keyword, window="1d"):
     encoded = urllib.parse.quote(keyword)
     # US English settings for global news
-    url = f"https://news.google.com/rss/search?q={encoded}+when:1d&hl=en-US&gl=US&ceid=US:en"
-    feed = feedparser.parse(url)
-    
-    if not feed.entries: return None
-    
-    # Sort by published date (Newest first)
-    sorted_entries = sorted(feed.entries, key=lambda x: x.published_parsed, reverse=True)
-    entry = sorted_entries[0]
-    
-    return {
-        'title': entry.title,
-        'link': entry.link,
-        'keyword': keyword,
-        'pub_date': entry.published
-    }
+    return f"{FEED_BASE_URL}?q={encoded}+when:{window}&hl=en-US&gl=US&ceid=US:en"
 
-def extract_content(text, tag):
-    """Helper to parse Claude output"""
-    pattern = f"\[{tag}\](.*?)\[/{tag}\]"
-    match = re.search(pattern, text, re.DOTALL)
-    return match.group(1).strip() if match else None
+class KeywordScheduler:
+    """Adaptive per-keyword polling (SQLite).
+    Tracks each keyword's publication rate (EWMA of new articles/hour), polls
+    it about every NEWS_PER_KEYWORD articles' worth of time (shrinking at once,
+    growing at most SCHEDULE_BACKOFF-fold per poll), and sizes the feed's when:
+    window to cover everything since the last successful fetch."""
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS keyword_schedule ("
+            "keyword TEXT PRIMARY KEY, last_fetch REAL, newest REAL, rate REAL, interval REAL)"
+        )
+        if 'interval' not in [row[1] for row in self.db.execute("PRAGMA table_info(keyword_schedule)")]:
+            self.db.execute("ALTER TABLE keyword_schedule ADD COLUMN interval REAL")
+        self.db.commit()
+
+    def _state(self, keyword):
+        with self.lock:
+            return self.db.execute(
+                "SELECT last_fetch, newest, rate, interval FROM keyword_schedule WHERE keyword = ?", (keyword,)
+            ).fetchone()
+
+    @staticmethod
+    def interval(rate, previous=None):
+        """Seconds until the next poll: NEWS_PER_KEYWORD articles at `rate`, growing at most
+        SCHEDULE_BACKOFF-fold from `previous` so one empty fetch doesn't park a keyword for a week"""
+        target = SCHEDULE_MAX_INTERVAL if not rate else NEWS_PER_KEYWORD / rate * 3600
+        ceiling = previous * SCHEDULE_BACKOFF if previous else SCHEDULE_FIRST_INTERVAL
+        return min(SCHEDULE_MAX_INTERVAL, ceiling, max(SCHEDULE_MIN_INTERVAL, target))
+
+    def next_due(self, keyword):
+        state = self._state(keyword)
+        if not state: return 0
+        return state[0] + (state[3] or self.interval(state[2]))
+
+    def due(self, keywords, now=None):
+        now = now or time.time()
+        return [k for k in keywords if self.next_due(k) - SCHEDULE_SLACK <= now]
+
+    def window(self, keyword, now=None):
+        """when: value covering the time since the last successful fetch (1d for new keywords).
+        Rounded up to SCHEDULE_WINDOWS so the feed URL (and its cached ETag) stays stable."""
+        state = self._state(keyword)
+        if not state: return f"{SCHEDULE_WINDOWS[0]}d"
+        days = ((now or time.time()) - state[0] + 3600) / 86400
+        return f"{next((d for d in SCHEDULE_WINDOWS if d >= days), SCHEDULE_WINDOWS[-1])}d"
+
+    def observe(self, keyword, entries, now=None):
+        """Record a successful fetch: articles newer than the last one seen, per hour elapsed"""
+        now = now or time.time()
+        state = self._state(keyword)
+        last_fetch, newest, rate, previous = state if state else (now - 86400, None, None, None)
+        stamps = [ts for ts in (published_ts(e) for e in entries) if ts != float('-inf')]
+        since = newest if newest is not None else last_fetch
+        fresh = sum(1 for ts in stamps if ts > since)
+        observed = fresh / max((now - last_fetch) / 3600, 1)
+        rate = observed if rate is None else SCHEDULE_RATE_SMOOTHING * observed + (1 - SCHEDULE_RATE_SMOOTHING) * rate
+        newest = max(stamps + ([newest] if newest is not None else []), default=None)
+        interval = self.interval(rate, previous)
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO keyword_schedule (keyword, last_fetch, newest, rate, interval) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (keyword, now, newest, rate, interval)
+            )
+            self.db.commit()
+        metrics.gauge("keyword_articles_per_hour", round(rate, 3), keyword=keyword)
+
+class FeedCache:
+    """ETag/Last-Modified + last parsed entries per feed URL (SQLite)"""
+    FIELDS = ('title', 'link', 'published', 'published_parsed', 'updated_parsed')
+    TIME_FIELDS = ('published_parsed', 'updated_parsed')
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS feeds ("
+            "url TEXT PRIMARY KEY, etag TEXT, modified TEXT, entries TEXT, fetched REAL)"
+        )
+        self.db.commit()
+
+    def get(self, url):
+        with self.lock:
+            row = self.db.execute("SELECT etag, modified, entries FROM feeds WHERE url = ?", (url,)).fetchone()
+        if not row: return None, None, None
+        entries = []
+        for data in json.loads(row[2]):
+            for k in self.TIME_FIELDS:
+                if data.get(k): data[k] = time.struct_time(data[k])
+            entries.append(feedparser.FeedParserDict(data))
+        return row[0], row[1], entries
+
+    def put(self, url, etag, modified, entries):
+        # Only the fields sourcing reads are kept (struct_time -> list for JSON)
+        slim = [
+            {k: list(e[k]) if k in self.TIME_FIELDS and e.get(k) else e.get(k) for k in self.FIELDS}
+            for e in entries
+        ]
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO feeds (url, etag, modified, entries, fetched) VALUES (?, ?, ?, ?, ?)",
+                (url, etag, modified, json.dumps(slim, ensure_ascii=False), time.time())
+            )
+            self.db.commit()
+
+_feed_cache = None
+_feed_cache_lock = threading.Lock()
+_scheduler = None
+
+def get_scheduler():
+    """Shared keyword scheduler (None if the cache file is disabled: every keyword, when:1d)"""
+    global _scheduler
+    with _feed_cache_lock:
+        if _scheduler is None and CACHE_FILE:
+            try:
+                _scheduler = KeywordScheduler(CACHE_FILE)
+            except sqlite3.Error as e:
+                print(f"⚠️ [JIT Warning] Keyword scheduler disabled: {e}")
+                _scheduler = False
+    return _scheduler or None
+
+def get_feed_cache():
+    """Shared feed cache (None if disabled or the cache file can't be opened)"""
+    global _feed_cache
+    with _feed_cache_lock:
+        if _feed_cache is None and CACHE_FILE and FEED_CONDITIONAL_GET:
+            try:
+                _feed_cache = FeedCache(CACHE_FILE)
+            except sqlite3.Error as e:
+                print(f"⚠️ [JIT Warning] Feed cache disabled: {e}")
+                _feed_cache = False
+    return _feed_cache or None
 
 @jit_retry
-def generate_content_jit(article):
-    """Generate Content using Claude 3 Haiku"""
-    if not ANTHROPIC_API_KEY: raise Exception("API Key Missing")
+def fetch_feed_entries(url):
+    """Conditional GET: a 304 reuses the previously parsed entries (None once retries run out)"""
+    cache = get_feed_cache()
+    etag, modified, cached_entries = cache.get(url) if cache else (None, None, None)
     
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-    results = {}
+    host_limiter.wait(url)
+    with metrics.span("feed_fetch", url=url) as span, BREAKERS["google_news"].guard():
+        feed = feedparser.parse(url, etag=etag, modified=modified)
+        span['http_status'] = feed.get('status')
+        # feedparser never raises: surface outages so the breaker sees them
+        if feed.get('status') is None and feed.get('bozo'):
+            raise UpstreamError(f"Feed unreachable: {feed.get('bozo_exception')}")
+        if feed.get('status', 200) == 429 or feed.get('status', 200) >= 500:
+            raise UpstreamError(f"Feed HTTP {feed.get('status')}", feed.get('status'))
+        
+        if feed.get('status') == 304 and cached_entries is not None:
+            span['entries'] = len(cached_entries)
+            return cached_entries
+        if cache and feed.entries and (feed.get('etag') or feed.get('modified')):
+            cache.put(url, feed.get('etag'), feed.get('modified'), feed.entries)
+        span['entries'] = len(feed.entries)
+        return feed.entries
 
-    base_prompt = f"""
-    You are an AI content engine. 
-    Task: Generate a LinkedIn post (English) and an Image Prompt (English).
+def published_ts(entry):
+    """Entry publish time as a UTC timestamp (entries without one rank last)"""
+    parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+    return calendar.timegm(parsed) if parsed else float('-inf')
+
+def iter_latest_news_jit(keyword):
+    """Yield articles newest first. Heapify is O(n), each pop O(log n),
+    so the first article is ready without ranking the whole feed."""
+    scheduler = get_scheduler()
+    entries = fetch_feed_entries(build_feed_url(keyword, scheduler.window(keyword) if scheduler else "1d"))
+    # A failed fetch isn't a poll: the keyword stays due and its window keeps growing
+    if scheduler and entries is not None: scheduler.observe(keyword, entries)
     
-    [News]: {article['title']} ({article['link']})
+    # Index breaks ties so entries themselves are never compared
+    heap = [(-published_ts(entry), i, entry) for i, entry in enumerate(entries or [])]
+    heapq.heapify(heap)
+    while heap:
+        entry = heapq.heappop(heap)[2]
+        if not entry.get('title') or not entry.get('link'): continue
+        yield {
+            'title': entry.title,
+            'link': entry.link,
+            'keyword': keyword,
+            'pub_date': entry.get('published', '')
+        }
+
+def get_top_news_jit(keyword, k=None):
+    """Get the K LATEST news (Sorted by time)"""
+    return list(itertools.islice(iter_latest_news_jit(keyword), k or NEWS_PER_KEYWORD))
+
+def get_latest_news_jit(keyword):
+    """Get the LATEST news (Sorted by time)"""
+    return next(iter_latest_news_jit(keyword), None)
+
+def fetch_all_news_jit(keywords):
+    """Source all keywords in parallel (results keep KEYWORDS order).
+    Returns one list of up to NEWS_PER_KEYWORD articles per keyword."""
+    def fetch(keyword):
+        try:
+            return get_top_news_jit(keyword)
+        except Exception as e:
+            print(f"⚠️ [JIT Warning] Sourcing failed for {keyword}: {e}")
+            return []
+
+    return run_parallel(fetch, keywords, FETCH_WORKERS)
+
+MINHASH_PRIME = (1 << 61) - 1
+_minhash_rng = random.Random(20240307)  # Fixed seed: signatures must be stable across runs
+MINHASH_COEFFS = [
+    (_minhash_rng.randrange(1, MINHASH_PRIME), _minhash_rng.randrange(0, MINHASH_PRIME))
+    for _ in range(DEDUP_PERMUTATIONS)
+]
+
+def split_source(title):
+    """'Headline - Outlet' (Google News style) -> ('Headline', 'Outlet')"""
+    head, sep, source = (title or "").rpartition(" - ")
+    if sep and head and 0 < len(source) <= 40:
+        return head, source.strip()
+    return title or "", ""
+
+def normalize_title(title):
+    head, _ = split_source(title)
+    head = re.sub(r"^\s*(\[[^\]]*\]\s*)+", "", head)  # [단독], [속보], ...
+    return re.sub(r"[\W_]+", "", head.lower())
+
+def minhash_signature(text, shingle=DEDUP_SHINGLE):
+    """MinHash over character shingles (works for Korean and English titles)"""
+    grams = {text[i:i + shingle] for i in range(max(1, len(text) - shingle + 1))}
+    hashed = [int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=8).digest(), 'little') for g in grams]
+    return [min((a * h + b) % MINHASH_PRIME for h in hashed) for a, b in MINHASH_COEFFS]
+
+def collapse_near_duplicates(articles):
+    """Cluster near-duplicate articles with MinHash + LSH banding (sub-quadratic).
+    Returns one representative per cluster (first seen, input order kept)
+    with the other members listed under 'alternates'."""
+    # Titles shorter than one shingle (e.g. all punctuation) hash to the same
+    # signature, so they stay out of LSH and keep their own cluster
+    titles = [normalize_title(a['title']) for a in articles]
+    signatures = [minhash_signature(t) if len(t) >= DEDUP_SHINGLE else None for t in titles]
+    parent = list(range(len(articles)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = DEDUP_PERMUTATIONS // DEDUP_BANDS
+    buckets = {}
+    for i, sig in enumerate(signatures):
+        if sig is None: continue
+        for band in range(DEDUP_BANDS):
+            buckets.setdefault((band, tuple(sig[band * rows:(band + 1) * rows])), []).append(i)
+
+    def similar(i, j):
+        return sum(x == y for x, y in zip(signatures[i], signatures[j])) / DEDUP_PERMUTATIONS >= DEDUP_THRESHOLD
+
+    for members in buckets.values():
+        # Each member is checked against one member of every cluster already in
+        # this bucket, so two near-duplicates still meet when the first isn't like them
+        kept = members[:1]
+        for j in members[1:]:
+            matched = False
+            for i in kept:
+                if find(i) == find(j):
+                    matched = True
+                elif similar(i, j):
+                    parent[max(find(i), find(j))] = min(find(i), find(j))
+                    matched = True
+            if not matched: kept.append(j)
+
+    representatives = []
+    for i, article in enumerate(articles):
+        root = find(i)
+        if root == i:
+            article.setdefault('alternates', [])
+            representatives.append(article)
+        else:
+            _, source = split_source(article['title'])
+            articles[root].setdefault('alternates', []).append({
+                'title': article['title'], 'link': article['link'],
+                'keyword': article.get('keyword'), 'source': source
+            })
+    return representatives
+
+class TokenBucket:
+    """Request rate limiter, re-synced from the API's rate-limit headers"""
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def update_from_headers(self, headers):
+        """Sync with anthropic-ratelimit-requests-* headers"""
+        limit = headers.get("anthropic-ratelimit-requests-limit")
+        remaining = headers.get("anthropic-ratelimit-requests-remaining")
+        reset = headers.get("anthropic-ratelimit-requests-reset")
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if limit:
+                self.capacity = float(limit)
+                self.rate = self.capacity / 60.0
+            if remaining is None: return
+            self.tokens = min(self.tokens, float(remaining))
+            if reset and self.tokens < 1:
+                # Bucket is empty until the server-side window resets
+                try:
+                    reset_at = datetime.datetime.fromisoformat(reset.replace("Z", "+00:00"))
+                    delay = (reset_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+                except ValueError:
+                    delay = 0
+                if delay > 0:
+                    self.tokens = 1 - delay * self.rate
+
+api_limiter = TokenBucket(GEN_REQUESTS_PER_MINUTE)
+_client_lock = threading.Lock()
+
+class JitCache:
+    """On-disk cache of generated variants (SQLite, TTL + LRU eviction)"""
+    def __init__(self, path, ttl_days=CACHE_TTL_DAYS, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl = ttl_days * 86400
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        # timeout: wait on other processes' write locks instead of failing
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS variants ("
+            "key TEXT PRIMARY KEY, value TEXT, created REAL, accessed REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS variants_accessed ON variants (accessed)")
+        self.db.commit()
+
+    @staticmethod
+    def make_key(article, style_name):
+        raw = "\x1f".join([
+            article['link'], article['title'], STYLES[style_name], GEN_MODEL, str(GEN_TEMPERATURE)
+        ])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.db.execute("SELECT value, created FROM variants WHERE key = ?", (key,)).fetchone()
+            if not row: return None
+            if now - row[1] > self.ttl:
+                self.db.execute("DELETE FROM variants WHERE key = ?", (key,))
+                self.db.commit()
+                return None
+            self.db.execute("UPDATE variants SET accessed = ? WHERE key = ?", (now, key))
+            self.db.commit()
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO variants (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            self.db.execute("DELETE FROM variants WHERE created < ?", (now - self.ttl,))
+            # Least recently used entries go first once over the size limit
+            self.db.execute(
+                "DELETE FROM variants WHERE key IN ("
+                "SELECT key FROM variants ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.db.commit()
+
+_cache = None
+
+def get_cache():
+    """Shared variant cache (None if the cache file can't be opened)"""
+    global _cache
+    with _client_lock:
+        if _cache is None and CACHE_FILE:
+            try:
+                _cache = JitCache(CACHE_FILE)
+            except sqlite3.Error as e:
+                print(f"⚠️ [JIT Warning] Cache disabled: {e}")
+                _cache = False
+    return _cache or None
+
+class RunJournal:
+    """Append-only JSON-lines checkpoint log of one day's completed units.
+    Units are (kind, id) pairs: ('sourced', keyword), ('generated', link + style),
+    ('email', subject), ('archived', date). Entries from other runs are dropped on load."""
+    def __init__(self, path, run_key):
+        self.path = path
+        self.run_key = run_key
+        self.lock = threading.Lock()
+        self.done = {}
+        stale = False
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line from a killed run
+                    if entry.get('run') != run_key:
+                        stale = True
+                        continue
+                    self.done[(entry['unit'], entry['id'])] = entry.get('data')
+        if stale: self._rewrite()
+        if self.done: print(f"♻️ Resuming run {run_key}: {len(self.done)} unit(s) already done")
+
+    def _line(self, unit, unit_id, data):
+        return json.dumps({'run': self.run_key, 'unit': unit, 'id': unit_id, 'data': data}, ensure_ascii=False) + "\n"
+
+    def _rewrite(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for (unit, unit_id), data in self.done.items():
+                f.write(self._line(unit, unit_id, data))
+        os.replace(tmp, self.path)
+
+    def has(self, unit, unit_id):
+        return (unit, unit_id) in self.done
+
+    def get(self, unit, unit_id):
+        return self.done.get((unit, unit_id))
+
+    def record(self, unit, unit_id, data=None):
+        """Mark a unit done; flushed to disk before returning so a crash right after keeps it"""
+        with self.lock:
+            self.done[(unit, unit_id)] = data
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(self._line(unit, unit_id, data))
+                f.flush()
+                os.fsync(f.fileno())
+
+    @staticmethod
+    def variant_id(article, style_name):
+        return f"{article['link']}\x1f{style_name}"
+
+_journal = None
+
+def get_journal():
+    """Checkpoint journal for today's run (None if disabled or unwritable)"""
+    global _journal
+    with _client_lock:
+        if _journal is None and JOURNAL_FILE:
+            try:
+                _journal = RunJournal(JOURNAL_FILE, datetime.date.today().isoformat())
+            except OSError as e:
+                print(f"⚠️ [JIT Warning] Checkpoints disabled: {e}")
+                _journal = False
+    return _journal or None
+
+_client = None
+
+def get_client():
+    """Shared Anthropic client (one connection pool per run)"""
+    global _client
+    if not ANTHROPIC_API_KEY: raise JitFatalError("API Key Missing")
+    with _client_lock:
+        if _client is None:
+            # jit_retry owns retries (classification, backoff, budget), so the SDK's are off
+            _client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY, max_retries=0)
+    return _client
+
+# Everything but the style guide is shared by an article's style calls,
+# so it goes first and is sent as one cacheable prefix block
+BASE_PROMPT = """
+    You are an AI content engine. 
+    Task: Generate a LinkedIn post (English) and an Image Prompt (English),
+    written in the [Style Guide] given at the end.
     
-    [Style Guide]
-    {{style_guide}}
+    [News]: {title} ({link})
     
     [Output Format - Strictly Follow This]
     [POST]
@@ -110,113 +912,976 @@ def generate_content_jit(article):
     (Write the image generation prompt here. Include '--ar 16:9' at the end.)
     [/IMAGE]
     """
+
+STYLE_PROMPT = """
+    [Style Guide]
+    {style_guide}
+    """
+
+MULTI_PROMPT = """
+    You are an AI content engine. 
+    Task: For EACH style below, generate a LinkedIn post (English) and an Image Prompt (English).
+    
+    [News]: {title} ({link})
     
-    for style_name, guide in STYLES.items():
-        full_prompt = base_prompt.format(style_guide=guide)
+    [Style Guides]
+    {style_guides}
+    
+    [Output Format - Strictly Follow This, once per style, using the exact style name]
+    [POST:StyleName]
+    (Write the post text here. No hashtags at start.)
+    [/POST:StyleName]
+    
+    [IMAGE:StyleName]
+    (Write the image generation prompt here. Include '--ar 16:9' at the end.)
+    [/IMAGE:StyleName]
+    """
+
+SECTION_PATTERN = re.compile(r"\[(POST|IMAGE)(?::([^\]]+))?\](.*?)\[/\1(?(2):\2)\]", re.DOTALL)
+
+def extract_content(text, tag, style=None):
+    """Helper to parse Claude output"""
+    if style:
+        pattern = rf"\[{tag}:{re.escape(style)}\](.*?)\[/{tag}:{re.escape(style)}\]"
+    else:
+        pattern = rf"\[{tag}\](.*?)\[/{tag}\]"
+    match = re.search(pattern, text, re.DOTALL)
+    return match.group(1).strip() if match else None
+
+class SectionStream:
+    """Incremental [POST]/[IMAGE] parser for streamed output.
+    Each section is filled in as soon as its closing tag arrives (first one wins,
+    like extract_content); `done` once every expected style has both sections."""
+    def __init__(self, styles=None):
+        self.styles = styles or [None]  # None: untagged single-style output
+        self.buffer = ""
+        self.scanned = 0  # Everything before this offset is already parsed
+        self.sections = {}
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        for match in SECTION_PATTERN.finditer(self.buffer, self.scanned):
+            tag, style, body = match.groups()
+            self.sections.setdefault(style.strip() if style else None, {}).setdefault(tag, body.strip())
+            self.scanned = match.end()
+        return self.done
+
+    @property
+    def done(self):
+        return all(len(self.sections.get(style, {})) == 2 for style in self.styles)
+
+def extract_all_content(text):
+    """Parse every [POST:Style]/[IMAGE:Style] section in one pass.
+    Returns {style: {'text','prompt'}} for styles where both sections were found."""
+    parser = SectionStream()
+    parser.feed(text or "")
+    return styled_variants(parser.sections)
+
+def styled_variants(sections):
+    return {
+        style: {"text": parts["POST"], "prompt": parts["IMAGE"]}
+        for style, parts in sections.items()
+        if style in STYLES and parts.get("POST") and parts.get("IMAGE")
+    }
+
+def record_usage(usage, span=None, output_tokens=None):
+    """Token counters (and span attributes) for one response, incl. prompt-cache reads/writes.
+    output_tokens overrides usage's count (estimate for a stream that was cut short)."""
+    counts = {
+        "input": usage.input_tokens,
+        "output": usage.output_tokens if output_tokens is None else output_tokens,
+        "cache_read": getattr(usage, "cache_read_input_tokens", None) or 0,
+        "cache_write": getattr(usage, "cache_creation_input_tokens", None) or 0,
+    }
+    for kind, value in counts.items():
+        metrics.count("tokens", value, type=kind)
+        if span is not None: span[f"{kind}_tokens"] = value
+
+def call_claude(prompt, max_tokens=800):
+    """One rate-limited messages.create call, returns the raw text.
+    prompt is a string or a list of content blocks (see style_prompt)."""
+    client = get_client()
+    blocks = [prompt] if isinstance(prompt, str) else [block['text'] for block in prompt]
+    
+    with BREAKERS["anthropic"].guard():
+        api_limiter.acquire()
+        with metrics.span("messages.create", model=GEN_MODEL,
+                          prompt_bytes=sum(len(text.encode('utf-8')) for text in blocks)) as span:
+            # Use Claude 3 Haiku (Reliable & Fast)
+            raw_response = client.messages.with_raw_response.create(
+                model=GEN_MODEL, 
+                max_tokens=max_tokens,
+                temperature=GEN_TEMPERATURE,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            api_limiter.update_from_headers(raw_response.headers)
+            message = raw_response.parse()
+            text = message.content[0].text
+            record_usage(message.usage, span)
+            span['response_bytes'] = len(text.encode('utf-8'))
+    return text
+
+def stream_claude(prompt, styles=None, max_tokens=800):
+    """Streaming call_claude: parses sections as tokens arrive and drops the
+    stream once every expected section has closed (trailing chatter is never
+    generated). Returns SectionStream.sections."""
+    client = get_client()
+    blocks = [prompt] if isinstance(prompt, str) else [block['text'] for block in prompt]
+    parser = SectionStream(styles)
+    
+    with BREAKERS["anthropic"].guard():
+        api_limiter.acquire()
+        with metrics.span("messages.stream", model=GEN_MODEL,
+                          prompt_bytes=sum(len(text.encode('utf-8')) for text in blocks)) as span:
+            with client.messages.stream(
+                model=GEN_MODEL,
+                max_tokens=max_tokens,
+                temperature=GEN_TEMPERATURE,
+                messages=[{"role": "user", "content": prompt}]
+            ) as stream:
+                api_limiter.update_from_headers(stream.response.headers)
+                for chunk in stream.text_stream:
+                    if parser.feed(chunk):
+                        span['early_stop'] = True
+                        metrics.count("stream_early_stops")
+                        break
+                usage = stream.current_message_snapshot.usage
+                if span.get('early_stop'):
+                    # The closing message_delta (real usage) never arrives, and the
+                    # snapshot still holds message_start's placeholder: ~4 chars per token
+                    span['output_tokens_estimated'] = True
+                    record_usage(usage, span, output_tokens=max(1, -(-len(parser.buffer) // 4)))
+                else:
+                    record_usage(usage, span)
+            span['response_bytes'] = len(parser.buffer.encode('utf-8'))
+    return parser.sections
+
+def style_prompt(article, style_name):
+    """Content blocks: the article's shared prefix (cache breakpoint) + this style's guide"""
+    prefix = {"type": "text", "text": BASE_PROMPT.format(title=article['title'], link=article['link'])}
+    if GEN_PROMPT_CACHE: prefix["cache_control"] = {"type": "ephemeral"}
+    return [prefix, {"type": "text", "text": STYLE_PROMPT.format(style_guide=STYLES[style_name])}]
+
+def prefix_cacheable(article):
+    """Whether the API will actually cache this article's prefix (~4 chars per token);
+    shorter prefixes are silently sent uncached"""
+    prefix = BASE_PROMPT.format(title=article['title'], link=article['link'])
+    return GEN_PROMPT_CACHE and len(prefix) // 4 >= GEN_PROMPT_CACHE_MIN_TOKENS
+
+def parse_style_output(raw):
+    return {
+        "text": extract_content(raw, "POST") or "Generation Failed",
+        "prompt": extract_content(raw, "IMAGE") or "Prompt Failed"
+    }
+
+@jit_retry
+def generate_style_jit(article, style_name):
+    """Generate one style variant using Claude 3 Haiku"""
+    if GEN_STREAM:
+        parts = stream_claude(style_prompt(article, style_name)).get(None, {})
+        return {"text": parts.get("POST") or "Generation Failed", "prompt": parts.get("IMAGE") or "Prompt Failed"}
+    return parse_style_output(call_claude(style_prompt(article, style_name)))
+
+@jit_retry
+def generate_multi_style_jit(article, style_names):
+    """Generate several styles in ONE call (shared news block sent once)"""
+    style_guides = "\n".join(f"### {name}{STYLES[name]}" for name in style_names)
+    prompt = MULTI_PROMPT.format(title=article['title'], link=article['link'], style_guides=style_guides)
+    if GEN_STREAM:
+        return styled_variants(stream_claude(prompt, styles=list(style_names), max_tokens=800 * len(style_names)))
+    return extract_all_content(call_claude(prompt, max_tokens=800 * len(style_names)))
+
+def poll_batch(client, batch):
+    """Poll a Message Batch until it ends, backing off between polls.
+    Past GEN_BATCH_TIMEOUT the batch is cancelled; it then ends quickly and
+    still returns whatever finished before the cancel."""
+    delay = GEN_BATCH_POLL
+    deadline = time.monotonic() + GEN_BATCH_TIMEOUT
+    while batch.processing_status != "ended":
+        if time.monotonic() > deadline and batch.processing_status == "in_progress":
+            print(f"⚠️ [JIT Warning] Batch {batch.id} timed out, cancelling")
+            batch = client.messages.batches.cancel(batch.id)
+            continue
+        time.sleep(delay)
+        delay = min(delay * 2, GEN_BATCH_POLL_MAX)
+        try:
+            with BREAKERS["anthropic"].guard():
+                batch = client.messages.batches.retrieve(batch.id)
+        except Exception as e:
+            if not is_retryable(e): raise
+            print(f"⚠️ [JIT Warning] Batch poll failed, will retry: {e}")
+    return batch
+
+def generate_batch_jit(units):
+    """Generate (article, style) units as ONE Message Batch.
+    Returns one {'text','prompt'} per unit, None where the batch had no answer
+    (errored/expired/cancelled requests, or the whole batch failing)."""
+    outputs = [None] * len(units)
+    if not units: return outputs
+    journal = get_journal()
+    # A rerun of the same unit set resumes the batch submitted earlier today
+    batch_key = hashlib.sha256("\n".join(
+        RunJournal.variant_id(article, style_name) for article, style_name in units
+    ).encode('utf-8')).hexdigest()[:16]
+    
+    try:
+        client = get_client()
+        with metrics.span("batch", requests=len(units)) as span:
+            batch_id = journal and journal.get('batch', batch_key)
+            if batch_id:
+                print(f"♻️ Resuming batch {batch_id}")
+                batch = client.messages.batches.retrieve(batch_id)
+            else:
+                with BREAKERS["anthropic"].guard():
+                    batch = client.messages.batches.create(requests=[
+                        {
+                            "custom_id": f"unit-{n}",
+                            "params": {
+                                "model": GEN_MODEL,
+                                "max_tokens": 800,
+                                "temperature": GEN_TEMPERATURE,
+                                "messages": [{"role": "user", "content": style_prompt(article, style_name)}],
+                            },
+                        }
+                        for n, (article, style_name) in enumerate(units)
+                    ])
+                print(f"📦 Submitted batch {batch.id} ({len(units)} requests)")
+                if journal: journal.record('batch', batch_key, batch.id)
+            batch = poll_batch(client, batch)
+            span['batch_id'] = batch.id
+            
+            for entry in client.messages.batches.results(batch.id):
+                metrics.count("batch_results", result=entry.result.type)
+                if entry.result.type != "succeeded": continue
+                message = entry.result.message
+                outputs[int(entry.custom_id.split("-")[1])] = parse_style_output(message.content[0].text)
+                record_usage(message.usage)
+    except Exception as e:
+        print(f"⚠️ [JIT Warning] Batch generation failed: {e}")
+    return outputs
+
+def generate_all_jit(articles):
+    """Generate every (article, style) variant in parallel.
+    Each style is its own retry unit, so one failed style keeps its siblings.
+    Returns one {style: {'text','prompt'}} dict per article (None if every style failed)."""
+    results = [{} if article else None for article in articles]
+    cache = get_cache()
+    journal = get_journal()
+    
+    # Variants finished earlier today (checkpoint) or cached cost nothing
+    for i, article in enumerate(articles):
+        if not article: continue
+        for style_name in STYLES:
+            done = journal and journal.get('generated', RunJournal.variant_id(article, style_name))
+            if not done and cache:
+                done = cache.get(JitCache.make_key(article, style_name))
+            if done: results[i][style_name] = done
+    
+    def remember(i, style_name, variant):
+        # Save as soon as a variant exists, so a failed sibling style doesn't waste it
+        if variant['text'] == "Generation Failed" or variant['prompt'] == "Prompt Failed": return
+        if journal: journal.record('generated', RunJournal.variant_id(articles[i], style_name), variant)
+        if cache: cache.put(JitCache.make_key(articles[i], style_name), variant)
+    
+    def missing(i):
+        return [name for name in STYLES if name not in results[i]]
+    
+    if GEN_SINGLE_CALL:
+        indexes = [i for i, article in enumerate(articles) if article and missing(i)]
+        outputs = run_parallel(lambda i: generate_multi_style_jit(articles[i], missing(i)), indexes, GEN_WORKERS)
+        for i, parsed in zip(indexes, outputs):
+            for style_name, variant in (parsed or {}).items():
+                results[i][style_name] = variant
+                remember(i, style_name, variant)
+    
+    elif GEN_BATCH:
+        units = [(i, style_name) for i, article in enumerate(articles) if article for style_name in missing(i)]
+        outputs = generate_batch_jit([(articles[i], style_name) for i, style_name in units])
+        for (i, style_name), variant in zip(units, outputs):
+            if variant is None: continue
+            results[i][style_name] = variant
+            remember(i, style_name, variant)
+    
+    # Per-style calls (or fallback for styles the single call / batch failed to produce)
+    units = [(i, style_name) for i, article in enumerate(articles) if article for style_name in missing(i)]
+    if (GEN_SINGLE_CALL or GEN_BATCH) and units:
+        print(f"⚠️ [JIT Warning] Re-requesting {len(units)} missing style(s) individually")
+    
+    # A prefix is only readable from cache once its first request is answered, so for
+    # cacheable articles one style goes ahead and its siblings follow in a second wave
+    leaders = {}
+    for i, style_name in units:
+        if prefix_cacheable(articles[i]): leaders.setdefault(i, (i, style_name))
+    first = set(leaders.values())
+    outputs = {}
+    for wave in ([u for u in units if u in first], [u for u in units if u not in first]):
+        outputs.update(zip(wave, run_parallel(lambda u: generate_style_jit(articles[u[0]], u[1]), wave, GEN_WORKERS)))
+    
+    for (i, style_name), variant in outputs.items():
+        if variant is None:
+            print(f"⚠️ [JIT Warning] {style_name} failed for: {articles[i]['title'][:40]}")
+            continue
+        remember(i, style_name, variant)
+        results[i][style_name] = variant
+    
+    # Keep STYLES order regardless of which path produced each variant
+    ordered = []
+    for variants in results:
+        kept = {name: variants[name] for name in STYLES if name in variants} if variants else {}
+        ordered.append(kept or None)
+    return ordered
+
+def generate_content_jit(article):
+    """Generate Content using Claude 3 Haiku"""
+    return generate_all_jit([article])[0]
+
+# --- 3. Archive ---
+
+class NewsArchive:
+    """Append-only Markdown archive with a small sidecar index.
+    The index maps each day to its (file, byte offset) sections and short
+    hashes of its URLs, so lookups never rescan the Markdown."""
+    DAY_HEADER = re.compile(r"^## 📅 (\d{4})년 (\d{1,2})월 (\d{1,2})일")
+    LINK_LINE = re.compile(r"^- \[.*\]\((\S+)\)\s*$")
+
+    def __init__(self, path=ARCHIVE_FILE, index_path=ARCHIVE_INDEX_FILE,
+                 shard_dir=ARCHIVE_SHARD_DIR, max_bytes=ARCHIVE_MAX_BYTES):
+        self.path = path
+        self.index_path = index_path
+        self.shard_dir = shard_dir
+        self.max_bytes = max_bytes
+        self.index = self._load_index()
+        self.seen = {h for day in self.index['days'].values() for h in day['urls']}
+
+    @staticmethod
+    def url_key(url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+
+    def _load_index(self):
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ [Archive] Index unreadable, rebuilding: {e}")
+        return self.rebuild_index()
+
+    def rebuild_index(self):
+        """One-time scan of existing archive files (only needed without an index)"""
+        index = {'days': {}}
+        files = [self.path]
+        if os.path.isdir(self.shard_dir):
+            files += sorted(os.path.join(self.shard_dir, name) for name in os.listdir(self.shard_dir))
+        for path in files:
+            if not os.path.exists(path): continue
+            day = None
+            offset = 0
+            with open(path, 'rb') as f:
+                for raw_line in f:
+                    line = raw_line.decode('utf-8', 'replace')
+                    header = self.DAY_HEADER.match(line)
+                    if header:
+                        date = "%s-%02d-%02d" % (header.group(1), int(header.group(2)), int(header.group(3)))
+                        day = index['days'].setdefault(date, {'sections': [], 'urls': []})
+                        day['sections'].append([path, offset])
+                    link = self.LINK_LINE.match(line)
+                    if link and day is not None:
+                        day['urls'].append(self.url_key(link.group(1)))
+                    offset += len(raw_line)
+        return index
+
+    def _save_index(self):
+        # Still one JSON document, but one line per day (sorted): a run's git
+        # diff is just its own day's line instead of one ever-growing line
+        days = sorted(self.index['days'].items())
+        lines = [
+            f"{json.dumps(date)}: {json.dumps(day, ensure_ascii=False, separators=(',', ':'))}"
+            for date, day in days
+        ]
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('{"days": {\n' + ",\n".join(lines) + ("\n" if lines else "") + "}}\n")
+        os.replace(tmp_path, self.index_path)
+
+    def is_archived(self, url):
+        return self.url_key(url) in self.seen
+
+    def _target_file(self, date):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < self.max_bytes:
+            return self.path
+        os.makedirs(self.shard_dir, exist_ok=True)
+        return os.path.join(self.shard_dir, f"NEWS_ARCHIVE_{date.strftime('%Y-%m')}.md")
+
+    def append_day(self, date, sections):
+        """Append one day's {keyword: [(title, link), ...]} section, skipping archived URLs.
+        Returns the number of new links written."""
+        fresh = {}
+        for keyword, links in sections.items():
+            new_links = [(title, link) for title, link in links if link and not self.is_archived(link)]
+            if new_links: fresh[keyword] = new_links
+        if not fresh: return 0
         
-        # Use Claude 3 Haiku (Reliable & Fast)
-        message = client.messages.create(
-            model="claude-3-haiku-20240307", 
-            max_tokens=800,
-            temperature=0.7,
-            messages=[{"role": "user", "content": full_prompt}]
-        )
+        lines = [f"## 📅 {date.year}년 {date.month}월 {date.day}일", ""]
+        for keyword, links in fresh.items():
+            lines.append(f"### {keyword}")
+            lines += [f"- [{title}]({link})" for title, link in links]
+            lines.append("")
+        lines += ["---", "", ""]
         
-        raw = message.content[0].text
-        results[style_name] = {
-            "text": extract_content(raw, "POST") or "Generation Failed",
-            "prompt": extract_content(raw, "IMAGE") or "Prompt Failed"
-        }
-        time.sleep(1) # Rate limit safety
+        path = self._target_file(date)
+        if not os.path.exists(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("# 📰 Market Watcher 아카이브\n\n")
+        with open(path, 'ab') as f:
+            offset = f.tell()
+            f.write("\n".join(lines).encode('utf-8'))
         
-    return results
+        day = self.index['days'].setdefault(date.strftime('%Y-%m-%d'), {'sections': [], 'urls': []})
+        day['sections'].append([path, offset])
+        for links in fresh.values():
+            for _, link in links:
+                url_key = self.url_key(link)
+                day['urls'].append(url_key)
+                self.seen.add(url_key)
+        self._save_index()
+        return sum(len(links) for links in fresh.values())
 
-# --- 3. Email & Main ---
+    def read_day(self, date_key):
+        """Markdown for one day ('YYYY-MM-DD'), read straight from the indexed offsets"""
+        day = self.index['days'].get(date_key)
+        if not day: return ""
+        chunks = []
+        for path, offset in day['sections']:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                for raw_line in f:
+                    if raw_line.strip() == b"---": break
+                    chunks.append(raw_line)
+        return b"".join(chunks).decode('utf-8')
 
-def generate_jit_email(results):
-    html = """
-    <html>
-    <body style="font-family: Helvetica, Arial, sans-serif; color: #333; max-width: 800px; margin: 0 auto;">
-        <h2 style="color: #6d28d9; border-bottom: 2px solid #6d28d9; padding-bottom: 10px;">
-            ⚡ JIT Content Factory (Claude Engine)
-        </h2>
-    """
-    
+    def files(self):
+        """Archive files touched so far (for git add)"""
+        touched = {path for day in self.index['days'].values() for path, _ in day['sections']}
+        return sorted({self.path, self.index_path} | touched)
+
+def archive_results(results):
+    """Append today's sourced articles (incl. alternates) to the archive"""
+    sections = {}
     for item in results:
-        status_color = "#2da44e" if item['status'] == 'published' else "#cf222e"
-        
-        html += f"""
-        <div style="margin-top: 30px; border: 1px solid #ddd; border-radius: 12px; overflow: hidden;">
-            <div style="padding: 15px; background: #f8f9fa; border-bottom: 1px solid #eee; display: flex; justify_content: space-between;">
-                <div>
-                    <span style="font-size: 11px; font-weight: bold; color: #666; text-transform: uppercase;">{item['keyword']}</span>
-                    <h3 style="margin: 5px 0 0 0; font-size:16px;"><a href="{item.get('link','#')}" style="text-decoration: none; color: #111;">{item.get('title', 'News Not Found')}</a></h3>
-                </div>
-                <div style="font-size:11px; font-weight:bold; color:{status_color}; border:1px solid {status_color}; padding:2px 8px; border-radius:10px; height: fit-content;">
-                    {item['status'].upper()}
-                </div>
+        if not item.get('link'): continue
+        links = sections.setdefault(item['keyword'], [])
+        links.append((item['title'], item['link']))
+        links += [(alt['title'], alt['link']) for alt in item.get('alternates', [])]
+    archive = NewsArchive()
+    written = archive.append_day(datetime.date.today(), sections)
+    print(f"🗂️ Archived {written} new link(s)")
+    return archive
+
+# --- 4. Email & Main ---
+
+class Safe(str):
+    """Already-rendered HTML: HtmlTemplate inserts it as is"""
+
+class HtmlTemplate:
+    """str.format-style template parsed once at import.
+    Rendering is a single join over the precomputed pieces; every field is
+    HTML-escaped unless it is Safe."""
+    def __init__(self, source):
+        self.pieces = [
+            (literal, field)
+            for literal, field, _, _ in string.Formatter().parse(textwrap.dedent(source).strip())
+        ]
+
+    def render(self, **values):
+        out = []
+        for literal, field in self.pieces:
+            out.append(literal)
+            if field is not None:
+                value = values[field]
+                out.append(value if isinstance(value, Safe) else escape(str(value)))
+        return Safe("".join(out))
+
+# Sent once per email instead of inline on every card
+EMAIL_CSS = """
+    body { font-family: Helvetica, Arial, sans-serif; color: #333; max-width: 800px; margin: 0 auto; }
+    h2 { color: #6d28d9; border-bottom: 2px solid #6d28d9; padding-bottom: 10px; }
+    .card { margin-top: 30px; border: 1px solid #ddd; border-radius: 12px; overflow: hidden; }
+    .card-head { padding: 15px; background: #f8f9fa; border-bottom: 1px solid #eee; display: flex; justify-content: space-between; }
+    .keyword { font-size: 11px; font-weight: bold; color: #666; text-transform: uppercase; }
+    .title { margin: 5px 0 0 0; font-size: 16px; }
+    .title a { text-decoration: none; color: #111; }
+    .alternates { font-size: 11px; color: #999; margin-top: 4px; }
+    .alternates a { color: #666; }
+    .status { font-size: 11px; font-weight: bold; color: #cf222e; border: 1px solid #cf222e; padding: 2px 8px; border-radius: 10px; height: fit-content; }
+    .status-published { color: #2da44e; border-color: #2da44e; }
+    .variants { display: grid; grid-template-columns: 1fr 1fr 1fr; border-top: 1px solid #eee; }
+    .variant { border-right: 1px solid #eee; display: flex; flex-direction: column; }
+    .variant-name { padding: 8px; font-weight: bold; font-size: 13px; }
+    .insight .variant-name { background: #e8f4fd; color: #0366d6; }
+    .story .variant-name { background: #f0fff4; color: #2da44e; }
+    .viral .variant-name { background: #fff8c5; color: #d29922; }
+    .variant-text { padding: 15px; font-size: 12px; line-height: 1.4; flex-grow: 1; }
+    .prompt { background: #2d3748; color: #fff; padding: 8px; font-size: 10px; margin: 10px; border-radius: 4px; }
+    .prompt-label { color: #4fd1c5; }
+    .prompt-text { font-family: monospace; }
+    .overflow { margin-top: 30px; font-size: 13px; }
+    .overflow li { margin-bottom: 4px; }
+"""
+
+EMAIL_HEAD = HtmlTemplate("""
+    <html>
+    <head><meta charset="utf-8"><style>{css}</style></head>
+    <body>
+        <h2>⚡ JIT Content Factory (Claude Engine)</h2>
+""")
+
+CARD_TEMPLATE = HtmlTemplate("""
+    <div class="card">
+        <div class="card-head">
+            <div>
+                <span class="keyword">{keyword}</span>
+                <h3 class="title"><a href="{link}">{title}</a></h3>
+                {alternates}
             </div>
-        """
-        
-        if item['status'] == 'published' and item.get('variants'):
-            html += """<div style="display: grid; grid-template-columns: 1fr 1fr 1fr; border-top: 1px solid #eee;">"""
-            
-            styles_map = [
-                ("📊 Insight", item['variants'].get('Insight'), "#e8f4fd", "#0366d6"),
-                ("☕ Story", item['variants'].get('Storytelling'), "#f0fff4", "#2da44e"),
-                ("🔥 Viral", item['variants'].get('Viral'), "#fff8c5", "#d29922")
-            ]
-            
-            for name, data, bg, accent in styles_map:
-                if not data: continue
-                html += f"""
-                <div style="border-right: 1px solid #eee; display: flex; flex-direction: column;">
-                    <div style="background:{bg}; padding:8px; font-weight:bold; color:{accent}; font-size:13px;">{name}</div>
-                    <div style="padding:15px; font-size:12px; line-height:1.4; flex-grow:1;">{data['text'].replace(chr(10), '<br>')}</div>
-                    <div style="background:#2d3748; color:#fff; padding:8px; font-size:10px; margin:10px; border-radius:4px;">
-                        <span style="color:#4fd1c5;">🎨 Prompt:</span><br>
-                        <span style="font-family:monospace;">{data['prompt'][:100]}...</span>
-                    </div>
-                </div>
-                """
-            html += "</div>"
-        
-        html += "</div>"
-        
-    html += "</body></html>"
-    return html
+            <div class="status status-{status}">{status_label}</div>
+        </div>
+        {variants}
+    </div>
+""")
+
+ALTERNATES_TEMPLATE = HtmlTemplate("""<div class="alternates">Also covered by: {links}</div>""")
+ALTERNATE_LINK = HtmlTemplate("""<a href="{link}">{name}</a>""")
+
+VARIANT_TEMPLATE = HtmlTemplate("""
+    <div class="variant {css_class}">
+        <div class="variant-name">{name}</div>
+        <div class="variant-text">{text}</div>
+        <div class="prompt">
+            <span class="prompt-label">🎨 Prompt:</span><br>
+            <span class="prompt-text">{prompt}...</span>
+        </div>
+    </div>
+""")
+
+# (style, label, css class) in card column order
+EMAIL_VARIANTS = [
+    ("Insight", "📊 Insight", "insight"),
+    ("Storytelling", "☕ Story", "story"),
+    ("Viral", "🔥 Viral", "viral"),
+]
+
+def render_card(item, styles=None):
+    """One article card as HTML (styles: variant columns to include, default all)"""
+    alternates = ""
+    if item.get('alternates'):
+        alternates = ALTERNATES_TEMPLATE.render(links=Safe(", ".join(
+            ALTERNATE_LINK.render(link=alt['link'], name=alt['source'] or alt['keyword'])
+            for alt in item['alternates']
+        )))
+    variants = ""
+    if item['status'] == 'published' and item.get('variants'):
+        columns = []
+        for style_name, label, css_class in EMAIL_VARIANTS:
+            data = item['variants'].get(style_name)
+            if not data or (styles is not None and style_name not in styles): continue
+            columns.append(VARIANT_TEMPLATE.render(
+                css_class=css_class, name=label,
+                text=Safe(escape(data['text']).replace("\n", "<br>")), prompt=data['prompt'][:100]
+            ))
+        variants = Safe('<div class="variants">' + "".join(columns) + "</div>")
+    return CARD_TEMPLATE.render(
+        keyword=item['keyword'], link=item.get('link', '#'), title=item.get('title', 'News Not Found'),
+        alternates=alternates, status=item['status'], status_label=item['status'].upper(), variants=variants
+    )
+
+LINK_TEMPLATE = HtmlTemplate("""<li><a href="{link}">{title}</a> <span class="keyword">{keyword}</span></li>""")
+OVERFLOW_HEAD = '<div class="overflow"><h3>More stories</h3><ul>'
+OVERFLOW_TAIL = "</ul></div>"
+EMAIL_TAIL = "\n</body></html>"
+
+def render_link(item):
+    """Compact one-line form of a card, for items past the byte budget"""
+    return LINK_TEMPLATE.render(link=item.get('link', '#'), title=item.get('title', 'News Not Found'), keyword=item['keyword'])
+
+def sized(html):
+    return html, len(html.encode('utf-8'))
+
+def base64_capacity(size):
+    """Most raw bytes whose base64 body (76-char lines + CRLF, as MIMEText sends utf-8) fits in `size`"""
+    lines, rest = divmod(max(0, size), 78)
+    return lines * 57 + max(0, rest - 2) // 4 * 3
+
+def iter_budgeted(head, indexes, card, link, budget=None):
+    """Head, then full cards while the HTML stays within `budget` raw UTF-8 bytes
+    (make_budgeted_message derives it from the encoded size), then every remaining item as a link line. card(i) / link(i) return (html, bytes).
+    Room for the later items' link lines is reserved up front, so the
+    switch happens early enough for every item to fit."""
+    indexes = list(indexes)
+    links = [link(i) for i in indexes] if budget else []
+    reserve = sum(size for _, size in links) + len(OVERFLOW_HEAD + OVERFLOW_TAIL + EMAIL_TAIL)
+    used = len(head.encode('utf-8'))
+    yield head
+    
+    overflow = len(indexes)
+    for n, i in enumerate(indexes):
+        html, size = card(i)
+        if budget:
+            reserve -= links[n][1]
+            if used + size + reserve > budget:
+                overflow = n
+                break
+        used += size
+        yield html
+    
+    if overflow < len(indexes):
+        metrics.count("email_overflow_items", len(indexes) - overflow)
+        yield OVERFLOW_HEAD
+        for html, _ in links[overflow:]:
+            yield html
+        yield OVERFLOW_TAIL
+    yield EMAIL_TAIL
+
+def iter_jit_email(results, budget=None):
+    """The email as a stream of HTML chunks (one per card; see iter_budgeted for `budget`)"""
+    return iter_budgeted(
+        EMAIL_HEAD.render(css=Safe(textwrap.dedent(EMAIL_CSS))), range(len(results)),
+        lambda i: sized(render_card(results[i])), lambda i: sized(render_link(results[i])), budget
+    )
+
+def render_text(results, budget=None):
+    """Compact plain-text alternative: headline, status and link per item.
+    Past `budget` raw bytes the rest is left to the HTML part."""
+    lines = ["JIT Content Factory (Claude Engine)", ""]
+    used = sum(len(line.encode('utf-8')) + 1 for line in lines) + 80  # + room for the "more" line
+    for n, item in enumerate(results):
+        block = [f"* [{item['keyword']}] {item.get('title', 'News Not Found')} ({item['status'].upper()})"]
+        if item.get('link'): block.append(f"  {item['link']}")
+        for alt in item.get('alternates', []):
+            block.append(f"  Also: {alt['source'] or alt['keyword']} {alt['link']}")
+        used += sum(len(line.encode('utf-8')) + 1 for line in block)
+        if budget and used > budget:
+            lines.append(f"... {len(results) - n} more in the HTML version")
+            break
+        lines += block
+    return "\n".join(lines) + "\n"
+
+def write_jit_email(results, out):
+    """Stream the email into a file-like object (memory stays at one card)"""
+    for chunk in iter_jit_email(results):
+        out.write(chunk)
+
+@traced("generate_jit_email")
+def generate_jit_email(results, budget=EMAIL_HTML_BUDGET):
+    return "".join(iter_jit_email(results, budget))
+
+class DigestRenderer:
+    """Personalised emails assembled from cached card fragments.
+    Each (article, style subset) card is rendered once, however many
+    subscribers receive it; a digest is a join of those fragments."""
+    def __init__(self, results):
+        self.results = results
+        self.head = EMAIL_HEAD.render(css=Safe(textwrap.dedent(EMAIL_CSS)))
+        self.cards = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def wants(item, keywords):
+        # A story collapsed into another keyword's card still counts for its own keyword
+        if keywords is None: return True
+        return item['keyword'] in keywords or any(alt['keyword'] in keywords for alt in item.get('alternates', []))
+
+    def fragment(self, key, form, render):
+        """(html, bytes) of a fragment, rendered on first use"""
+        with self.lock:
+            if key not in self.cards:
+                self.cards[key] = sized(render())
+                metrics.count("card_renders", form=form)
+            return self.cards[key]
+
+    def card(self, i, styles):
+        return self.fragment((i, styles), "card", lambda: render_card(self.results[i], styles))
+
+    def link(self, i):
+        return self.fragment((i, "link"), "link", lambda: render_link(self.results[i]))
+
+    def selected(self, keywords):
+        return [i for i, item in enumerate(self.results) if self.wants(item, keywords)]
+
+    def render(self, keywords=None, styles=None, budget=EMAIL_HTML_BUDGET):
+        """One subscriber's email (keywords/styles None = all)"""
+        styles = None if styles is None else tuple(name for name in STYLES if name in styles)
+        selected = self.selected(keywords)
+        with metrics.span("render_digest", articles=len(selected)) as span:
+            html = "".join(iter_budgeted(self.head, selected, lambda i: self.card(i, styles), self.link, budget))
+            span['bytes'] = len(html.encode('utf-8'))
+            return html
+
+    def render_text(self, keywords=None, budget=None):
+        return render_text([self.results[i] for i in self.selected(keywords)], budget)
+
+class SmtpPool:
+    """SMTP sessions reused across messages (authenticated when the server offers
+    AUTH and a password is set, so local relays work without one).
+    Up to `size` sessions send in parallel. A session the server dropped is
+    reopened and the message resent once; sessions are also recycled after
+    max_messages so servers with a per-session cap never cut one off mid-run."""
+    def __init__(self, user, password, size=SMTP_CONNECTIONS, max_messages=SMTP_MESSAGES_PER_SESSION):
+        self.user = user
+        self.password = password
+        self.max_messages = max_messages
+        self.auth_error = None  # Bad credentials fail every later send without reconnecting
+        self.slots = queue.Queue()
+        for _ in range(max(1, size)):
+            self.slots.put({'server': None, 'sent': 0})
+
+    def _connect(self, slot):
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        if SMTP_STARTTLS: server.starttls()
+        server.ehlo_or_helo_if_needed()
+        if self.password and server.has_extn('auth'):
+            try:
+                server.login(self.user, self.password)
+            except smtplib.SMTPAuthenticationError as e:
+                self.auth_error = e
+                server.close()
+                raise
+        slot['server'], slot['sent'] = server, 0
+        metrics.count("smtp_sessions")
+
+    @staticmethod
+    def _close(slot):
+        server, slot['server'] = slot['server'], None
+        if server is None: return
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    @staticmethod
+    def _dropped(e):
+        """The server ended the session (rather than rejecting this message)"""
+        return isinstance(e, (smtplib.SMTPServerDisconnected, ConnectionError)) or getattr(e, 'smtp_code', None) == 421
+
+    @staticmethod
+    def wire_bytes(msg):
+        """The message as send_message would transmit it (CRLF line endings)"""
+        return msg.as_bytes(policy=msg.policy.clone(linesep='\r\n'))
 
-def send_email(subject, html_body):
+    def send(self, msg):
+        if self.auth_error: raise self.auth_error
+        # Flattened once: the size goes on the span and the same bytes go out
+        data = self.wire_bytes(msg)
+        with metrics.span("smtp_send", bytes=len(data)):
+            self._send(msg['From'], msg['To'], data)
+
+    def _send(self, sender, recipient, data):
+        slot = self.slots.get()
+        try:
+            for attempt in (1, 2):
+                if slot['server'] is None: self._connect(slot)
+                try:
+                    slot['server'].sendmail(sender, [recipient], data)
+                    break
+                except (smtplib.SMTPException, OSError) as e:
+                    if not self._dropped(e): raise
+                    # Idle timeout / server-side cap: a fresh session gets one more try
+                    self._close(slot)
+                    if attempt == 2: raise
+                    metrics.count("smtp_reconnects")
+            slot['sent'] += 1
+            if slot['sent'] >= self.max_messages: self._close(slot)
+        finally:
+            self.slots.put(slot)
+
+    def close(self):
+        while not self.slots.empty():
+            self._close(self.slots.get())
+
+def deliver(messages):
+    """Send {recipient: message} over one SmtpPool, SMTP_CONNECTIONS at a time.
+    A message may also be a zero-argument function building it on demand.
+    Returns the recipients the server accepted."""
     user = os.environ.get("EMAIL_USER")
-    pw = os.environ.get("EMAIL_PASSWORD")
-    if not user: return
+    if not user or not messages: return []
+    pool = SmtpPool(user, os.environ.get("EMAIL_PASSWORD"))
     
+    def send(recipient):
+        try:
+            msg = messages[recipient]
+            pool.send(msg() if callable(msg) else msg)
+            return recipient
+        except Exception as e:
+            print(f"❌ Email Failed ({recipient}): {e}")
+            metrics.count("email_failures")
+            return None
+    
+    try:
+        sent = [r for r in run_parallel(send, list(messages), SMTP_CONNECTIONS) if r]
+    finally:
+        pool.close()
+    if sent: print(f"✅ JIT Email Sent to {len(sent)}/{len(messages)} recipient(s)")
+    return sent
+
+def load_subscribers():
+    """Subscribers as [{'email','keywords','styles'}] (None = all keywords / styles).
+    Bad entries are skipped with a warning; a config that can't be read (or has
+    no usable entry) falls back to EMAIL_RECIPIENTS so the run still goes out."""
+    fallback = [{'email': r, 'keywords': None, 'styles': None} for r in email_recipients()]
+    try:
+        if SUBSCRIBERS_JSON:
+            entries = json.loads(SUBSCRIBERS_JSON)
+        elif SUBSCRIBERS_FILE and os.path.exists(SUBSCRIBERS_FILE):
+            with open(SUBSCRIBERS_FILE, encoding='utf-8') as f:
+                entries = json.load(f)
+        else:
+            return fallback
+    except (OSError, ValueError) as e:
+        print(f"⚠️ [JIT Warning] Subscriber config unreadable ({e}), sending to EMAIL_RECIPIENTS")
+        return fallback
+    if not isinstance(entries, list):
+        print("⚠️ [JIT Warning] Subscriber config is not a list, sending to EMAIL_RECIPIENTS")
+        return fallback
+    
+    def names(value):
+        return value is None or (isinstance(value, list) and all(isinstance(v, str) for v in value))
+    
+    subscribers = []
+    for n, entry in enumerate(entries):
+        email = entry.get('email') if isinstance(entry, dict) else None
+        if not isinstance(email, str) or not email.strip():
+            print(f"⚠️ [JIT Warning] Subscriber #{n + 1} has no email, skipping")
+            continue
+        email = email.strip()
+        keywords, styles = entry.get('keywords'), entry.get('styles')
+        if not names(keywords) or not names(styles):
+            print(f"⚠️ [JIT Warning] {email}: keywords/styles must be lists of names, skipping")
+            continue
+        unknown = sorted(set(styles or []) - set(STYLES))
+        if unknown: print(f"⚠️ [JIT Warning] {email}: unknown style(s) {', '.join(unknown)}")
+        subscribers.append({
+            'email': email,
+            'keywords': keywords,
+            'styles': [name for name in styles if name in STYLES] if styles else None,
+        })
+    if not subscribers:
+        print("⚠️ [JIT Warning] No valid subscribers, sending to EMAIL_RECIPIENTS")
+        return fallback
+    return subscribers
+
+def subscribed_keywords(subscribers):
+    """Keywords to source: the default set for anyone following everything,
+    plus every keyword someone picked (KEYWORDS order first)"""
+    picked = []
+    if not subscribers or any(sub['keywords'] is None for sub in subscribers):
+        picked = list(KEYWORDS[:2])
+    for sub in subscribers:
+        picked += [k for k in sub['keywords'] or [] if k not in picked]
+    return sorted(picked, key=lambda k: KEYWORDS.index(k) if k in KEYWORDS else len(KEYWORDS))
+
+def email_recipients():
+    user = os.environ.get("EMAIL_USER")
+    return EMAIL_RECIPIENTS or ([user] if user else [])
+
+QP_UTF8 = email_charset.Charset('utf-8')
+QP_UTF8.body_encoding = email_charset.QP
+
+def mime_text(body, subtype):
+    """Text part in the shorter transfer encoding on the wire: quoted-printable for
+    mostly-ASCII bodies, base64 (never more than 4/3 plus line breaks) otherwise"""
+    parts = [MIMEText(body, subtype, 'utf-8'), MIMEText(body, subtype, QP_UTF8)]
+    return min(parts, key=lambda part: len(SmtpPool.wire_bytes(part)))
+
+def make_message(subject, html_body, recipient, message_id=None, text_body=None):
     msg = MIMEMultipart('alternative')
     msg['Subject'] = subject
-    msg['From'] = user
-    msg['To'] = user
-    msg.attach(MIMEText(html_body, 'html', 'utf-8'))
+    msg['From'] = os.environ.get("EMAIL_USER")
+    msg['To'] = recipient
+    if message_id: msg['Message-ID'] = message_id
+    # Clients show the last part they can render, so plain text goes first
+    if text_body: msg.attach(mime_text(text_body, 'plain'))
+    msg.attach(mime_text(html_body, 'html'))
+    return msg
+
+def make_budgeted_message(subject, render_html, recipient, message_id=None, render_plain=None,
+                          limit=EMAIL_SIZE_BUDGET):
+    """make_message whose encoded size stays within `limit`. render_plain(budget) and
+    render_html(budget) get raw byte budgets: the text part up to EMAIL_TEXT_BUDGET
+    encoded, the HTML whatever is left once headers and the text part are counted
+    (sized for base64, which the chosen encoding never exceeds)."""
+    text_body = render_plain(base64_capacity(min(EMAIL_TEXT_BUDGET, limit // 2))) if render_plain else None
+    skeleton = make_message(subject, "", recipient, message_id, text_body)
+    budget = max(1, base64_capacity(limit - len(SmtpPool.wire_bytes(skeleton))))
+    msg = make_message(subject, render_html(budget), recipient, message_id, text_body)
+    size = len(SmtpPool.wire_bytes(msg))
+    if size > limit:
+        # Only when the link-only overflow alone is over budget
+        print(f"⚠️ [JIT Warning] Email to {recipient} is {size} bytes (budget {limit}), Gmail may clip it")
+        metrics.count("email_over_budget")
+    return msg
+
+@traced("send_digests")
+def send_digests(subject, results, subscribers, message_id=None):
+    """Send each subscriber their own digest; returns the subscribers' emails that were accepted.
+    Messages are built as the pool gets to them, so only a few exist at once."""
+    digests = DigestRenderer(results)
     
-    try:
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(user, pw)
-        server.send_message(msg)
-        server.quit()
-        print("✅ JIT Email Sent")
-    except Exception as e:
-        print(f"❌ Email Failed: {e}")
+    def build(sub):
+        # Contents differ per subscriber, so each gets its own (still stable) Message-ID
+        tag = hashlib.sha1(sub['email'].encode('utf-8')).hexdigest()[:10]
+        return make_budgeted_message(subject, lambda budget: digests.render(sub['keywords'], sub['styles'], budget),
+                                     sub['email'], message_id and message_id.replace("@", f"-{tag}@", 1),
+                                     lambda budget: digests.render_text(sub['keywords'], budget))
+    
+    messages = {}
+    for sub in subscribers:
+        if not digests.selected(sub['keywords']):
+            print(f"📭 Nothing new for {sub['email']}, skipping")
+            continue
+        messages[sub['email']] = functools.partial(build, sub)
+    return deliver(messages)
 
 def main():
     print("⚡ Starting JIT (Claude)...")
     results = []
+    subscribers = load_subscribers()
+    keywords = subscribed_keywords(subscribers)
+    journal = get_journal()
     
-    for keyword in KEYWORDS[:2]: 
+    # 1. Sourcing (Latest, all keywords in parallel; keywords sourced earlier today are replayed)
+    found = {k: journal.get('sourced', k) for k in keywords if journal and journal.has('sourced', k)}
+    pending = [k for k in keywords if k not in found]
+    # 1a. Quiet keywords wait for their next slot (the scheduler adapts to how often each one publishes)
+    scheduler = get_scheduler()
+    if scheduler:
+        due = scheduler.due(pending)
+        for keyword in pending:
+            if keyword in due: continue
+            hours = (scheduler.next_due(keyword) - time.time()) / 3600
+            print(f"⏭️ Skipping {keyword}: next poll in ~{hours:.0f}h")
+            metrics.count("keywords_skipped")
+        keywords = [k for k in keywords if k in found or k in due]
+        pending = due
+    for keyword, articles in zip(pending, fetch_all_news_jit(pending)):
+        found[keyword] = articles
+        # Empty results aren't checkpointed: a rerun should try that keyword again
+        if journal and articles: journal.record('sourced', keyword, articles)
+    sourced = [
+        (keyword, article)
+        for keyword in keywords
+        for article in (found[keyword] or [None])
+    ]
+    # 1b. Near-duplicates (same story across keywords/outlets) collapse into one item
+    kept = {id(article) for article in collapse_near_duplicates([a for _, a in sourced if a])}
+    sourced = [(keyword, article) for keyword, article in sourced if article is None or id(article) in kept]
+    articles = [article for _, article in sourced]
+    
+    # 2. Generation (Claude with Retry, all articles & styles in parallel)
+    all_variants = generate_all_jit(articles)
+    
+    for (keyword, article), variants in zip(sourced, all_variants):
         print(f"🔍 Processing: {keyword}")
         item = {'keyword': keyword, 'status': 'pending'}
         
-        # 1. Sourcing (Latest)
-        article = get_latest_news_jit(keyword)
         if not article:
             item['status'] = 'jit_failed'
             results.append(item)
@@ -224,9 +1889,6 @@ def main():
             
         item.update(article)
         
-        # 2. Generation (Claude with Retry)
-        variants = generate_content_jit(article)
-        
         if variants:
             item['variants'] = variants
             item['status'] = 'published'
@@ -236,18 +1898,33 @@ def main():
         results.append(item)
         
     if results:
-        html = generate_jit_email(results)
         today = datetime.datetime.now().strftime('%Y-%m-%d')
-        send_email(f"[{today}] ⚡ JIT Brief (English+Prompt)", html)
+        subject = f"[{today}] ⚡ JIT Brief (English+Prompt)"
+        # Subscribers already served by an earlier attempt today are skipped
+        pending = [sub for sub in subscribers if not (journal and journal.has('email', f"{subject}\x1f{sub['email']}"))]
+        if subscribers and not pending:
+            print("♻️ Email already sent today, skipping")
+        elif pending:
+            for recipient in send_digests(subject, results, pending, message_id=f"<jit-brief-{today}@market-watcher>"):
+                if journal: journal.record('email', f"{subject}\x1f{recipient}")
         
-        # Git Auto-save
-        try:
-            os.system('git config --global user.name "MarketBot"')
-            os.system('git config --global user.email "bot@github.com"')
-            os.system(f'git add {ARCHIVE_FILE}')
-            os.system('git commit -m "Update: JIT Content" || echo "No changes"')
-            os.system('git push')
-        except: pass
+        if journal and journal.has('archived', today):
+            print("♻️ Archive already committed today, skipping")
+        else:
+            archive = archive_results(results)
+            
+            # Git Auto-save
+            try:
+                os.system('git config --global user.name "MarketBot"')
+                os.system('git config --global user.email "bot@github.com"')
+                os.system(f'git add {" ".join(path for path in archive.files() if os.path.exists(path))}')
+                os.system('git commit -m "Update: JIT Content" || echo "No changes"')
+                if os.system('git push') == 0 and journal:
+                    journal.record('archived', today)
+            except: pass
+    
+    report_breakers()
+    metrics.export()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
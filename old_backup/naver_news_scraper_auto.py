@@ -10,19 +10,561 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
 import sys
+from html import escape
+import sqlite3
+import hashlib
+import math
+import struct
+import asyncio
+import urllib.parse
+import requests.adapters
+
+# 선택적 고속 파서 (설치되어 있지 않으면 BeautifulSoup으로 동작)
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+# 히스토리 보관 기간 (일). 이보다 오래된 URL은 만료되어 다시 수집될 수 있습니다.
+HISTORY_EXPIRE_DAYS = 90
+
+# 블룸 필터 설정: 200만 URL / 오탐률 1% 기준 약 2.4MB
+BLOOM_CAPACITY = 2_000_000
+BLOOM_ERROR_RATE = 0.01
+
+# 검색 설정
+SEARCH_CONCURRENCY = 4     # 동시에 검색할 키워드 수 (= 세션 커넥션 풀 크기)
+SEARCH_MAX_PAGES = 5       # 키워드당 최대 페이지 수
+SEARCH_MIN_DELAY = 0.1     # 같은 호스트 요청 사이 최소 간격 (초)
+SEARCH_MAX_DELAY = 10.0    # 오류가 계속될 때 최대 간격 (초)
+
+# HTML 파서 백엔드: 'auto' | 'lxml' | 'selectolax' | 'bs4'
+PARSER_BACKEND = os.environ.get('NAVER_PARSER', 'auto')
+
+
+# --- 이메일 템플릿 ---
+# 모듈 로드 시 한 번만 만들어 두고, 본문은 조각을 모아 한 번에 join 합니다.
+# 템플릿에 들어가는 값은 모두 escape() 를 거쳐야 합니다.
+EMAIL_CSS = """
+    body {
+        font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
+        line-height: 1.6;
+        color: #333;
+        max-width: 800px;
+        margin: 0 auto;
+        padding: 20px;
+        background-color: #f5f5f5;
+    }
+    .container {
+        background-color: #ffffff;
+        border-radius: 8px;
+        padding: 30px;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    }
+    h1 {
+        color: #03C75A;
+        border-bottom: 3px solid #03C75A;
+        padding-bottom: 10px;
+        margin-bottom: 30px;
+    }
+    h2 {
+        color: #1a73e8;
+        margin-top: 30px;
+        margin-bottom: 15px;
+        font-size: 1.3em;
+    }
+    .article {
+        background-color: #f8f9fa;
+        border-left: 4px solid #1a73e8;
+        padding: 15px;
+        margin-bottom: 15px;
+        border-radius: 4px;
+        transition: all 0.3s ease;
+    }
+    .article:hover {
+        background-color: #e8f0fe;
+        box-shadow: 0 2px 8px rgba(0,0,0,0.1);
+    }
+    .article-title {
+        font-size: 1.1em;
+        font-weight: bold;
+        margin-bottom: 8px;
+    }
+    .article-title a {
+        color: #1a73e8;
+        text-decoration: none;
+    }
+    .article-title a:hover {
+        text-decoration: underline;
+    }
+    .article-meta {
+        color: #666;
+        font-size: 0.9em;
+        margin-top: 8px;
+    }
+    .press {
+        display: inline-block;
+        background-color: #e8f0fe;
+        padding: 2px 8px;
+        border-radius: 3px;
+        margin-right: 10px;
+        font-weight: 500;
+    }
+    .date {
+        color: #999;
+    }
+    .summary {
+        background-color: #e8f5e9;
+        padding: 15px;
+        border-radius: 4px;
+        margin-bottom: 30px;
+    }
+    .footer {
+        margin-top: 40px;
+        padding-top: 20px;
+        border-top: 1px solid #ddd;
+        text-align: center;
+        color: #999;
+        font-size: 0.9em;
+    }
+"""
+
+EMAIL_HEAD_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <style>{css}</style>
+</head>
+<body>
+    <div class="container">
+        <h1>📰 네이버 뉴스 스크래핑 결과</h1>
+
+        <div class="summary">
+            <strong>수집 시간:</strong> {collected_at}<br>
+            <strong>총 기사 수:</strong> {count}개<br>
+            <strong>키워드:</strong> {keywords}
+        </div>
+"""
+
+EMAIL_KEYWORD_TEMPLATE = """
+        <h2>🔍 {keyword} ({count}개)</h2>
+"""
+
+EMAIL_ARTICLE_TEMPLATE = """
+        <div class="article">
+            <div class="article-title">
+                <a href="{link}" target="_blank">{title}</a>
+            </div>
+            <div class="article-meta">
+                <span class="press">{press}</span>
+                <span class="date">{date}</span>
+            </div>
+        </div>
+"""
+
+EMAIL_FOOTER = """
+        <div class="footer">
+            네이버 뉴스 스크래퍼 by Python<br>
+            이 이메일은 자동으로 생성되었습니다.
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+
+# --- 검색 결과 파서 ---
+# 모든 백엔드가 같은 항목 구조를 읽습니다.
+ITEM_CLASS = 'api_subject_bx'
+TITLE_SELECTOR = '.sds-comps-text-type-headline1'
+LINK_SELECTOR = 'a[data-heatmap-target=".tit"]'
+PRESS_SELECTOR = '.sds-comps-profile-info-title-text'
+DATE_SELECTOR = '.sds-comps-profile-info-subtext'
+
+
+def _make_article(keyword, title, link, press, date):
+    title = (title or '').strip()
+    if not title or not link:
+        return None
+    return {
+        'keyword': keyword,
+        'title': title,
+        'link': link,
+        # 중첩된 텍스트에서 언론사 이름만 추출
+        'press': re.sub(r'\s+', ' ', press or '').strip(),
+        'date': (date or '').strip()
+    }
+
+
+def parse_results_bs4(html, keyword, limit=None):
+    """
+    BeautifulSoup(html.parser) 백엔드. 추가 패키지 없이 동작합니다.
+    """
+    articles = []
+    soup = BeautifulSoup(html, 'html.parser')
+
+    for item in soup.select('.' + ITEM_CLASS):
+        if limit is not None and len(articles) >= limit:
+            break
+        title_elem = item.select_one(TITLE_SELECTOR)
+        link_elem = item.select_one(LINK_SELECTOR)
+        press_elem = item.select_one(PRESS_SELECTOR)
+        date_elem = item.select_one(DATE_SELECTOR)
+        article = _make_article(
+            keyword,
+            title_elem.get_text() if title_elem else '',
+            link_elem.get('href', '') if link_elem else '',
+            press_elem.get_text() if press_elem else '',
+            date_elem.get_text() if date_elem else ''
+        )
+        if article:
+            articles.append(article)
+
+    return articles
+
+
+def parse_results_selectolax(html, keyword, limit=None):
+    """
+    selectolax(lexbor) 백엔드. 문서 전체를 C로 파싱하므로 가장 빠릅니다.
+    """
+    articles = []
+    tree = SelectolaxParser(html)
+
+    for item in tree.css('.' + ITEM_CLASS):
+        if limit is not None and len(articles) >= limit:
+            break
+        title_elem = item.css_first(TITLE_SELECTOR)
+        link_elem = item.css_first(LINK_SELECTOR)
+        press_elem = item.css_first(PRESS_SELECTOR)
+        date_elem = item.css_first(DATE_SELECTOR)
+        article = _make_article(
+            keyword,
+            title_elem.text() if title_elem else '',
+            link_elem.attributes.get('href') or '' if link_elem else '',
+            press_elem.text() if press_elem else '',
+            date_elem.text() if date_elem else ''
+        )
+        if article:
+            articles.append(article)
+
+    return articles
+
+
+def _class_xpath(class_name):
+    return f".//*[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+
+if lxml_etree is not None:
+    # 항목마다 다시 컴파일하지 않도록 XPath를 한 번만 컴파일해 둡니다.
+    LXML_TITLE = lxml_etree.XPath(_class_xpath('sds-comps-text-type-headline1'))
+    LXML_LINK = lxml_etree.XPath(".//a[@data-heatmap-target='.tit']/@href")
+    LXML_PRESS = lxml_etree.XPath(_class_xpath('sds-comps-profile-info-title-text'))
+    LXML_DATE = lxml_etree.XPath(_class_xpath('sds-comps-profile-info-subtext'))
+
+
+def _lxml_text(elems):
+    return ''.join(elems[0].itertext()) if elems else ''
+
+
+def parse_results_lxml(html, keyword, limit=None, chunk_size=16384):
+    """
+    lxml 스트리밍 백엔드.
+    HTML을 조각 단위로 밀어 넣다가 limit개 항목이 완성되면 나머지는 파싱하지 않습니다.
+    """
+    articles = []
+    data = html.encode('utf-8') if isinstance(html, str) else html
+    parser = lxml_etree.HTMLPullParser(events=('end',), tag='div', encoding='utf-8')
+
+    for pos in range(0, len(data), chunk_size):
+        parser.feed(data[pos:pos + chunk_size])
+        for _, elem in parser.read_events():
+            if ITEM_CLASS not in (elem.get('class') or '').split():
+                continue
+            link = LXML_LINK(elem)
+            article = _make_article(
+                keyword,
+                _lxml_text(LXML_TITLE(elem)),
+                link[0] if link else '',
+                _lxml_text(LXML_PRESS(elem)),
+                _lxml_text(LXML_DATE(elem))
+            )
+            if article:
+                articles.append(article)
+            if limit is not None and len(articles) >= limit:
+                return articles
+    parser.close()
+    return articles
+
+
+PARSERS = {
+    'lxml': parse_results_lxml if lxml_etree is not None else None,
+    'selectolax': parse_results_selectolax if SelectolaxParser is not None else None,
+    'bs4': parse_results_bs4,
+}
+
+
+def get_parser(name=PARSER_BACKEND):
+    """
+    이름으로 파서 백엔드를 고릅니다. 'auto'는 설치된 것 중 가장 빠른 것을 씁니다.
+    """
+    if name == 'auto':
+        for candidate in ('selectolax', 'lxml', 'bs4'):
+            if PARSERS[candidate]:
+                return PARSERS[candidate]
+    parser = PARSERS.get(name)
+    if parser is None:
+        print(f"파서 '{name}'을(를) 사용할 수 없어 bs4로 대체합니다.")
+        return parse_results_bs4
+    return parser
+
+
+class UrlHistory:
+    """
+    SQLite 기반 append-only URL 히스토리 저장소.
+
+    URL의 해시만 인덱스 테이블에 저장하므로 메모리 사용량은 히스토리 크기와
+    무관하게 일정하고, 추가/조회는 인덱스 한 번으로 끝납니다.
+    """
+
+    def __init__(self, db_file, expire_days=HISTORY_EXPIRE_DAYS):
+        self.db_file = db_file
+        self.expire_days = expire_days
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS urls ('
+            'url_hash BLOB PRIMARY KEY, first_seen REAL NOT NULL) WITHOUT ROWID'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS urls_first_seen ON urls (first_seen)')
+        # 변경이 있는 커밋마다 1씩 올라가는 세대 번호 (블룸 필터 동기화 확인용)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        self.conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0)")
+        self.conn.commit()
+        self._committed_changes = self.conn.total_changes
+
+    @staticmethod
+    def _hash(url):
+        # 16바이트 해시면 수억 건에서도 충돌 가능성은 무시할 수 있습니다.
+        return hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+
+    def __contains__(self, url):
+        return self.contains_hash(self._hash(url))
+
+    def contains_hash(self, url_hash):
+        row = self.conn.execute(
+            'SELECT 1 FROM urls WHERE url_hash = ?', (url_hash,)
+        ).fetchone()
+        return row is not None
+
+    def iter_hashes(self):
+        for (url_hash,) in self.conn.execute('SELECT url_hash FROM urls'):
+            yield url_hash
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM urls').fetchone()[0]
+
+    def add(self, url, seen_at=None):
+        self.add_hash(self._hash(url), seen_at)
+
+    def add_hash(self, url_hash, seen_at=None):
+        self.conn.execute(
+            'INSERT OR IGNORE INTO urls (url_hash, first_seen) VALUES (?, ?)',
+            (url_hash, seen_at or time.time())
+        )
+
+    def add_many(self, urls, seen_at=None):
+        seen_at = seen_at or time.time()
+        self.conn.executemany(
+            'INSERT OR IGNORE INTO urls (url_hash, first_seen) VALUES (?, ?)',
+            ((self._hash(url), seen_at) for url in urls)
+        )
+
+    def expire(self):
+        """
+        보관 기간이 지난 URL을 삭제합니다.
+
+        Returns:
+            int: 삭제된 URL 개수
+        """
+        if not self.expire_days:
+            return 0
+        cutoff = time.time() - self.expire_days * 86400
+        cursor = self.conn.execute('DELETE FROM urls WHERE first_seen < ?', (cutoff,))
+        return cursor.rowcount
+
+    def generation(self):
+        """
+        저장소의 세대 번호를 반환합니다.
+        URL이 추가되거나 만료된 커밋마다 증가하므로, 다른 프로세스가 쓴 내용도 감지할 수 있습니다.
+        """
+        return self.conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+
+    def commit(self):
+        if self.conn.total_changes != self._committed_changes:
+            self.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+        self.conn.commit()
+        self._committed_changes = self.conn.total_changes
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+class BloomFilter:
+    """
+    URL 해시용 블룸 필터.
+
+    "없음" 응답은 확실하므로 디스크 조회 없이 새 URL로 판단할 수 있고,
+    "있음" 응답만 히스토리 저장소에서 확인합니다.
+    비트 위치는 UrlHistory의 16바이트 해시에서 만들기 때문에
+    저장소의 해시만으로 언제든 다시 만들 수 있습니다.
+    """
+
+    MAGIC = b'BLM2'
+    HEADER = struct.Struct('<QQIIdQ')
+
+    def __init__(self, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        self.watermark = 0  # 필터가 반영한 UrlHistory 세대 번호
+
+    def _positions(self, url_hash):
+        # Kirsch-Mitzenmacher 이중 해싱: h1 + i*h2
+        h1 = int.from_bytes(url_hash[:8], 'little')
+        h2 = int.from_bytes(url_hash[8:16], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, url_hash):
+        for pos in self._positions(url_hash):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, url_hash):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(url_hash))
+
+    def is_full(self):
+        return self.count > self.capacity
+
+    def save(self, path):
+        header = self.MAGIC + self.HEADER.pack(self.num_bits, self.count, self.num_hashes,
+                                               self.capacity, self.error_rate, self.watermark)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            if f.read(4) != cls.MAGIC:
+                raise ValueError('블룸 필터 파일 형식이 아닙니다')
+            num_bits, count, num_hashes, capacity, error_rate, watermark = \
+                cls.HEADER.unpack(f.read(cls.HEADER.size))
+            bloom = cls.__new__(cls)
+            bloom.capacity = capacity
+            bloom.error_rate = error_rate
+            bloom.num_bits = num_bits
+            bloom.num_hashes = num_hashes
+            bloom.count = count
+            bloom.watermark = watermark
+            bloom.bits = bytearray(f.read())
+        if len(bloom.bits) != (num_bits + 7) // 8:
+            raise ValueError('블룸 필터 파일이 손상되었습니다')
+        return bloom
+
+    @classmethod
+    def rebuild(cls, history, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+        """
+        히스토리 저장소의 모든 해시로 필터를 다시 만듭니다.
+        저장된 URL 수가 용량을 넘으면 용량을 늘려서 만듭니다.
+        """
+        capacity = max(capacity, len(history) * 2)
+        bloom = cls(capacity, error_rate)
+        for url_hash in history.iter_hashes():
+            bloom.add(url_hash)
+        bloom.watermark = history.generation()
+        return bloom
+
+
+class HostPoliteness:
+    """
+    호스트별 적응형 요청 간격.
+
+    정상 응답이 오면 간격을 최소값 쪽으로 조금씩 줄이고,
+    429/5xx나 네트워크 오류가 나면 간격을 두 배로 늘립니다.
+    """
+
+    def __init__(self, min_delay=SEARCH_MIN_DELAY, max_delay=SEARCH_MAX_DELAY):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delays = {}
+        self.next_slot = {}
+
+    async def wait(self, host):
+        now = time.monotonic()
+        slot = max(now, self.next_slot.get(host, now))
+        self.next_slot[host] = slot + self.delays.get(host, self.min_delay)
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def success(self, host):
+        self.delays[host] = max(self.min_delay, self.delays.get(host, self.min_delay) * 0.8)
+
+    def backoff(self, host):
+        self.delays[host] = min(self.max_delay, self.delays.get(host, self.min_delay) * 2)
+
 
 class NaverNewsScraper:
-    def __init__(self, history_file='news_history.json'):
+    def __init__(self, history_file='news_history.json', use_bloom=True):
         self.base_url = "https://search.naver.com/search.naver"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
+        # 키워드마다 TCP/TLS 핸드셰이크를 새로 하지 않도록 keep-alive 세션을 공유합니다.
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=SEARCH_CONCURRENCY)
+        self.session.mount('https://', adapter)
+        self.politeness = HostPoliteness()
+        self.parse_results = get_parser()
         self.history_file = history_file
         self.url_history = self.load_history()
+        self.bloom_file = os.path.splitext(history_file)[0] + '.bloom'
+        self.bloom = self.load_bloom() if use_bloom else None
 
-    def search_news(self, keyword, max_results=5):
+    async def _fetch(self, params):
+        """
+        공유 세션으로 검색 페이지를 가져옵니다.
+        호스트별 적응형 딜레이를 지키고, 요청 자체는 스레드에서 실행해 이벤트 루프를 막지 않습니다.
+        """
+        host = urllib.parse.urlparse(self.base_url).netloc
+        await self.politeness.wait(host)
+        try:
+            response = await asyncio.to_thread(self.session.get, self.base_url, params=params, timeout=10)
+        except requests.RequestException:
+            self.politeness.backoff(host)
+            raise
+        if response.status_code == 429 or response.status_code >= 500:
+            self.politeness.backoff(host)
+        else:
+            self.politeness.success(host)
+        response.raise_for_status()
+        return response.text
+
+    async def search_news_async(self, keyword, max_results=5):
         """
         네이버 뉴스에서 키워드로 검색하여 최신 뉴스를 가져옵니다.
+        max_results개를 채우거나 이미 수집한 기사가 나올 때까지 다음 페이지(start)를 넘겨봅니다.
 
         Args:
             keyword: 검색할 키워드
@@ -32,67 +574,31 @@ class NaverNewsScraper:
             뉴스 기사 리스트
         """
         articles = []
-
-        params = {
-            'where': 'news',
-            'query': keyword,
-            'sort': '1',  # 최신순 정렬
-            'start': 1
-        }
+        seen_links = set()
+        start = 1
 
         try:
-            response = requests.get(self.base_url, params=params, headers=self.headers)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.text, 'html.parser')
+            for _ in range(SEARCH_MAX_PAGES):
+                params = {
+                    'where': 'news',
+                    'query': keyword,
+                    'sort': '1',  # 최신순 정렬
+                    'start': start
+                }
+                # 필요한 만큼만 파싱 (스트리밍 백엔드는 그 뒤를 읽지 않음)
+                page = self.parse_results(await self._fetch(params), keyword, limit=max_results - len(articles))
+                new_items = [a for a in page if a['link'] not in seen_links]
+                if not new_items:
+                    break
 
-            # 최신 네이버 뉴스 구조 파싱
-            news_items = soup.select('.api_subject_bx')
+                for article in new_items[:max_results - len(articles)]:
+                    seen_links.add(article['link'])
+                    articles.append(article)
 
-            count = 0
-            for item in news_items:
-                if count >= max_results:
+                # 최신순이므로 이미 수집한 기사가 나오면 그 뒤 페이지는 볼 필요가 없습니다.
+                if len(articles) >= max_results or any(self.is_duplicate(a['link']) for a in new_items):
                     break
-
-                try:
-                    # 제목 찾기 (새로운 구조)
-                    title_elem = item.select_one('.sds-comps-text-type-headline1')
-                    if not title_elem:
-                        continue
-
-                    title = title_elem.get_text().strip()
-
-                    # 링크 찾기
-                    link_elem = item.select_one('a[data-heatmap-target=".tit"]')
-                    link = link_elem.get('href', '') if link_elem else ''
-
-                    # 언론사 찾기
-                    press_elem = item.select_one('.sds-comps-profile-info-title-text')
-                    press = ''
-                    if press_elem:
-                        press_text = press_elem.get_text().strip()
-                        # 중첩된 텍스트에서 언론사 이름만 추출
-                        press = re.sub(r'\s+', ' ', press_text).strip()
-
-                    # 발행일 찾기
-                    date_elem = item.select_one('.sds-comps-profile-info-subtext')
-                    date = ''
-                    if date_elem:
-                        date = date_elem.get_text().strip()
-
-                    if title and link:
-                        article = {
-                            'keyword': keyword,
-                            'title': title,
-                            'link': link,
-                            'press': press,
-                            'date': date
-                        }
-                        articles.append(article)
-                        count += 1
-
-                except Exception as e:
-                    continue
+                start += len(page)
 
             print(f"'{keyword}' 검색 완료: {len(articles)}개 기사 수집")
 
@@ -101,45 +607,91 @@ class NaverNewsScraper:
 
         return articles
 
+    def search_news(self, keyword, max_results=5):
+        """
+        네이버 뉴스에서 키워드로 검색하여 최신 뉴스를 가져옵니다.
+
+        Args:
+            keyword: 검색할 키워드
+            max_results: 가져올 뉴스 개수 (기본값: 5)
+
+        Returns:
+            뉴스 기사 리스트
+        """
+        return asyncio.run(self.search_news_async(keyword, max_results))
+
     def load_history(self):
         """
-        URL 히스토리를 파일에서 불러옵니다.
+        URL 히스토리 저장소를 엽니다.
+        예전 JSON 히스토리 파일이 있으면 한 번만 SQLite로 옮깁니다.
 
         Returns:
-            set: 이전에 수집한 URL들의 집합
+            UrlHistory: 이전에 수집한 URL 저장소
         """
+        db_file = os.path.splitext(self.history_file)[0] + '.sqlite'
+        history = UrlHistory(db_file)
+
         if os.path.exists(self.history_file):
             try:
                 with open(self.history_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    urls = set(data.get('urls', []))
-                    print(f"히스토리 로드 완료: {len(urls)}개의 URL 기록")
-                    return urls
+                history.add_many(data.get('urls', []))
+                history.commit()
+                os.replace(self.history_file, self.history_file + '.migrated')
+                print(f"기존 JSON 히스토리를 {db_file}(으)로 이전했습니다.")
             except Exception as e:
-                print(f"히스토리 파일 로드 실패: {e}")
-                return set()
-        else:
-            print("히스토리 파일이 없습니다. 새로 시작합니다.")
-            return set()
+                print(f"히스토리 파일 이전 실패: {e}")
+
+        print(f"히스토리 로드 완료: {db_file}")
+        return history
 
     def save_history(self):
         """
-        현재 URL 히스토리를 파일에 저장합니다.
+        현재 URL 히스토리를 커밋하고 만료된 URL을 정리합니다.
         """
         try:
-            data = {
-                'urls': list(self.url_history),
-                'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            expired = self.url_history.expire()
+            # 커밋 전 세대가 필터와 다르면 그 사이 다른 프로세스가 쓴 URL이 필터에 없습니다.
+            in_sync = self.bloom is not None and self.bloom.watermark == self.url_history.generation()
+            self.url_history.commit()
+            if expired:
+                print(f"만료된 URL {expired}개 삭제")
+            if self.bloom is not None:
+                # 만료된 URL은 필터에서 지울 수 없으므로 용량을 넘으면 다시 만듭니다.
+                if self.bloom.is_full() or not in_sync:
+                    self.bloom = BloomFilter.rebuild(self.url_history)
+                self.bloom.watermark = self.url_history.generation()
+                self.bloom.save(self.bloom_file)
             print(f"히스토리 저장 완료: {len(self.url_history)}개의 URL")
         except Exception as e:
             print(f"히스토리 저장 실패: {e}")
 
+    def load_bloom(self):
+        """
+        블룸 필터를 파일에서 불러옵니다.
+        파일이 없거나 손상되었으면 히스토리 저장소에서 다시 만듭니다.
+
+        Returns:
+            BloomFilter: URL 해시 블룸 필터
+        """
+        if os.path.exists(self.bloom_file):
+            try:
+                bloom = BloomFilter.load(self.bloom_file)
+                # 필터 저장 이후 히스토리가 바뀌었으면(필터 없이 추가, 다른 프로세스의 쓰기 등)
+                # "없음" 응답을 믿을 수 없으므로 다시 만듭니다.
+                if not bloom.is_full() and bloom.watermark == self.url_history.generation():
+                    return bloom
+            except Exception as e:
+                print(f"블룸 필터 로드 실패: {e}")
+
+        bloom = BloomFilter.rebuild(self.url_history)
+        print(f"블룸 필터 재생성 완료: {bloom.count}개의 URL")
+        return bloom
+
     def is_duplicate(self, url):
         """
         URL이 이미 수집된 적이 있는지 확인합니다.
+        블룸 필터가 "없음"이라고 하면 디스크 조회 없이 새 URL로 판단합니다.
 
         Args:
             url: 확인할 URL
@@ -147,7 +699,10 @@ class NaverNewsScraper:
         Returns:
             bool: 중복이면 True, 아니면 False
         """
-        return url in self.url_history
+        url_hash = UrlHistory._hash(url)
+        if self.bloom is not None and url_hash not in self.bloom:
+            return False
+        return self.url_history.contains_hash(url_hash)
 
     def add_to_history(self, url):
         """
@@ -156,7 +711,25 @@ class NaverNewsScraper:
         Args:
             url: 추가할 URL
         """
-        self.url_history.add(url)
+        url_hash = UrlHistory._hash(url)
+        self.url_history.add_hash(url_hash)
+        if self.bloom is not None:
+            self.bloom.add(url_hash)
+
+    async def scrape_multiple_keywords_async(self, keywords, max_results=5):
+        """
+        여러 키워드를 동시에 검색합니다. (동시 요청 수는 SEARCH_CONCURRENCY로 제한)
+
+        Returns:
+            키워드 순서대로 정렬된 기사 리스트의 리스트
+        """
+        semaphore = asyncio.Semaphore(SEARCH_CONCURRENCY)
+
+        async def search(keyword):
+            async with semaphore:
+                return await self.search_news_async(keyword, max_results)
+
+        return await asyncio.gather(*(search(keyword) for keyword in keywords))
 
     def scrape_multiple_keywords(self, keywords, max_results=5):
         """
@@ -173,9 +746,9 @@ class NaverNewsScraper:
         all_articles = []
         duplicate_count = 0
 
-        for keyword in keywords:
-            articles = self.search_news(keyword, max_results)
+        results = asyncio.run(self.scrape_multiple_keywords_async(keywords, max_results))
 
+        for articles in results:
             # 중복 체크 및 필터링
             for article in articles:
                 url = article['link']
@@ -186,8 +759,6 @@ class NaverNewsScraper:
                     all_articles.append(article)
                     self.add_to_history(url)
 
-            time.sleep(1)  # 서버 부하 방지를 위한 딜레이
-
         if duplicate_count > 0:
             print(f"\n총 {duplicate_count}개의 중복 기사를 제외했습니다.")
 
@@ -276,149 +847,46 @@ class NaverNewsScraper:
             print(f"✗ 이메일 전송 실패: {e}")
             return False
 
-    def _generate_html_email(self, articles):
+    def _iter_html_email(self, articles):
         """
-        HTML 형식의 이메일 본문을 생성합니다.
+        HTML 이메일 본문을 조각 단위로 생성합니다 (기사 하나당 한 조각).
+        제목/언론사 등 모든 값은 HTML 이스케이프됩니다.
         """
         # 키워드별로 기사 그룹화
         grouped = {}
         for article in articles:
-            keyword = article['keyword']
-            if keyword not in grouped:
-                grouped[keyword] = []
-            grouped[keyword].append(article)
-
-        # HTML 템플릿
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <style>
-                body {{
-                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #333;
-                    max-width: 800px;
-                    margin: 0 auto;
-                    padding: 20px;
-                    background-color: #f5f5f5;
-                }}
-                .container {{
-                    background-color: #ffffff;
-                    border-radius: 8px;
-                    padding: 30px;
-                    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                }}
-                h1 {{
-                    color: #03C75A;
-                    border-bottom: 3px solid #03C75A;
-                    padding-bottom: 10px;
-                    margin-bottom: 30px;
-                }}
-                h2 {{
-                    color: #1a73e8;
-                    margin-top: 30px;
-                    margin-bottom: 15px;
-                    font-size: 1.3em;
-                }}
-                .article {{
-                    background-color: #f8f9fa;
-                    border-left: 4px solid #1a73e8;
-                    padding: 15px;
-                    margin-bottom: 15px;
-                    border-radius: 4px;
-                    transition: all 0.3s ease;
-                }}
-                .article:hover {{
-                    background-color: #e8f0fe;
-                    box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-                }}
-                .article-title {{
-                    font-size: 1.1em;
-                    font-weight: bold;
-                    margin-bottom: 8px;
-                }}
-                .article-title a {{
-                    color: #1a73e8;
-                    text-decoration: none;
-                }}
-                .article-title a:hover {{
-                    text-decoration: underline;
-                }}
-                .article-meta {{
-                    color: #666;
-                    font-size: 0.9em;
-                    margin-top: 8px;
-                }}
-                .press {{
-                    display: inline-block;
-                    background-color: #e8f0fe;
-                    padding: 2px 8px;
-                    border-radius: 3px;
-                    margin-right: 10px;
-                    font-weight: 500;
-                }}
-                .date {{
-                    color: #999;
-                }}
-                .summary {{
-                    background-color: #e8f5e9;
-                    padding: 15px;
-                    border-radius: 4px;
-                    margin-bottom: 30px;
-                }}
-                .footer {{
-                    margin-top: 40px;
-                    padding-top: 20px;
-                    border-top: 1px solid #ddd;
-                    text-align: center;
-                    color: #999;
-                    font-size: 0.9em;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h1>📰 네이버 뉴스 스크래핑 결과</h1>
-
-                <div class="summary">
-                    <strong>수집 시간:</strong> {datetime.now().strftime('%Y년 %m월 %d일 %H:%M')}<br>
-                    <strong>총 기사 수:</strong> {len(articles)}개<br>
-                    <strong>키워드:</strong> {', '.join(grouped.keys())}
-                </div>
-        """
-
-        # 키워드별 기사 추가
-        for keyword, keyword_articles in grouped.items():
-            html += f"""
-                <h2>🔍 {keyword} ({len(keyword_articles)}개)</h2>
-            """
+            grouped.setdefault(article['keyword'], []).append(article)
 
+        yield EMAIL_HEAD_TEMPLATE.format(
+            css=EMAIL_CSS,
+            collected_at=datetime.now().strftime('%Y년 %m월 %d일 %H:%M'),
+            count=len(articles),
+            keywords=escape(', '.join(grouped.keys())),
+        )
+        for keyword, keyword_articles in grouped.items():
+            yield EMAIL_KEYWORD_TEMPLATE.format(keyword=escape(keyword), count=len(keyword_articles))
             for article in keyword_articles:
-                html += f"""
-                <div class="article">
-                    <div class="article-title">
-                        <a href="{article['link']}" target="_blank">{article['title']}</a>
-                    </div>
-                    <div class="article-meta">
-                        <span class="press">{article['press']}</span>
-                        <span class="date">{article['date']}</span>
-                    </div>
-                </div>
-                """
-
-        html += """
-                <div class="footer">
-                    네이버 뉴스 스크래퍼 by Python<br>
-                    이 이메일은 자동으로 생성되었습니다.
-                </div>
-            </div>
-        </body>
-        </html>
+                yield EMAIL_ARTICLE_TEMPLATE.format(
+                    link=escape(article['link']),
+                    title=escape(article['title']),
+                    press=escape(article['press']),
+                    date=escape(article['date']),
+                )
+        yield EMAIL_FOOTER
+
+    def _generate_html_email(self, articles):
+        """
+        HTML 형식의 이메일 본문을 생성합니다.
         """
+        return ''.join(self._iter_html_email(articles))
 
-        return html
+    def write_html_email(self, articles, out):
+        """
+        HTML 이메일 본문을 파일 객체에 바로 씁니다.
+        기사가 수천 개여도 메모리에는 기사 한 개 분량만 올라갑니다.
+        """
+        for chunk in self._iter_html_email(articles):
+            out.write(chunk)
 
 def main():
     print("=" * 50)